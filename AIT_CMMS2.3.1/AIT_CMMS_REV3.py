@@ -861,69 +861,18 @@ class PMSchedulingService:
 
     def _load_priority_assets(self) -> Dict[str, int]:
         """Load priority assets from CSV files and create a BFM -> Priority mapping"""
-        priority_map = {}
-
-        # Define priority CSV files and their priority levels
-        priority_files = [
-            ('PM_LIST_A220_1.csv', 1),  # P1 assets
-            ('PM_LIST_A220_2.csv', 2),  # P2 assets
-            ('PM_LIST_A220_3.csv', 3),  # P3 assets
-        ]
-
+        # Go through csv_sync so edits that are still waiting to be written
+        # to the CSV files are included, matching get_priority_from_csv.
         try:
-            # Get the directory where the script is located
-            # Use os.getcwd() as fallback if __file__ is not available
-            try:
-                script_dir = os.path.dirname(os.path.abspath(__file__))
-            except NameError:
-                script_dir = os.getcwd()
-
-            for filename, priority in priority_files:
-                filepath = os.path.join(script_dir, filename)
-
-                if not os.path.exists(filepath):
-                    print(f"Info: Priority file {filename} not found at {filepath}")
-                    continue
-
-                try:
-                    # Read CSV file
-                    df = pd.read_csv(filepath, encoding='utf-8-sig')
-
-                    # Check if BFM column exists
-                    if 'BFM' not in df.columns:
-                        print(f"Warning: BFM column not found in {filename}")
-                        continue
-
-                    # Map each BFM number to its priority
-                    for bfm in df['BFM'].dropna().unique():
-                        try:
-                            if pd.notna(bfm):
-                                # Handle both string and numeric BFM values
-                                if isinstance(bfm, str):
-                                    bfm_str = bfm.strip()
-                                elif isinstance(bfm, (int, float)):
-                                    bfm_str = str(int(float(bfm)))
-                                else:
-                                    bfm_str = str(bfm)
-
-                                if bfm_str:
-                                    priority_map[bfm_str] = priority
-                        except (ValueError, TypeError) as e:
-                            print(f"Warning: Could not convert BFM value '{bfm}' in {filename}: {e}")
-                            continue
-
-                    print(f"Loaded {len([b for b in df['BFM'].dropna() if pd.notna(b)])} priority {priority} assets from {filename}")
-
-                except pd.errors.EmptyDataError:
-                    print(f"Warning: {filename} is empty")
-                except pd.errors.ParserError as e:
-                    print(f"Warning: Could not parse {filename}: {e}")
-                except Exception as e:
-                    print(f"Warning: Error loading {filename}: {str(e)}")
-
+            priority_map = load_priority_map()
         except Exception as e:
             print(f"Warning: Error in priority asset loading system: {str(e)}")
             print("Continuing with empty priority map - all assets will have default priority")
+            priority_map = {}
+
+        for priority in (1, 2, 3):
+            count = sum(1 for p in priority_map.values() if p == priority)
+            print(f"Loaded {count} priority {priority} assets from PM_LIST_A220_{priority}.csv")
 
         print(f"Total priority assets loaded: {len(priority_map)}")
         return priority_map
@@ -16929,7 +16878,8 @@ class AITCMMSSystem:
         cursor = self.conn.cursor()
         cursor.execute('''
             SELECT cm_number, bfm_equipment_no, description, priority, assigned_technician, 
-                status, created_date, completion_date, labor_hours, notes, root_cause, corrective_action
+                status, created_date, completion_date, labor_hours, notes, root_cause, corrective_action,
+                version
             FROM corrective_maintenance 
             WHERE cm_number = ?
         ''', (cm_number,))
@@ -16942,7 +16892,7 @@ class AITCMMSSystem:
         # Extract CM data
         (orig_cm_number, orig_bfm_no, orig_description, orig_priority, orig_assigned, 
         orig_status, orig_created, orig_completion, orig_hours, orig_notes, 
-        orig_root_cause, orig_corrective_action) = cm_data
+        orig_root_cause, orig_corrective_action, orig_version) = cm_data
 
         # Create edit dialog
         dialog = tk.Toplevel(self.root)
@@ -17068,34 +17018,30 @@ class AITCMMSSystem:
                     messagebox.showerror("Error", "Please enter a description")
                     return
 
-                # Update database
+                # Update database; only succeeds if nobody else saved this CM
+                # since the dialog was opened
                 cursor = self.conn.cursor()
-                cursor.execute('''
-                    UPDATE corrective_maintenance SET
-                    bfm_equipment_no = ?,
-                    description = ?,
-                    priority = ?,
-                    assigned_technician = ?,
-                    status = ?,
-                    labor_hours = ?,
-                    completion_date = ?,
-                    notes = ?,
-                    root_cause = ?,
-                    corrective_action = ?
-                    WHERE cm_number = ?
-                ''', (
-                    bfm_var.get(),
-                    description_text.get('1.0', 'end-1c'),
-                    priority_var.get(),
-                    assigned_var.get(),
-                    status_var.get(),
-                    float(labor_hours_var.get() or 0),
-                    completion_date_var.get() if completion_date_var.get() else None,
-                    notes_text.get('1.0', 'end-1c'),
-                    root_cause_text.get('1.0', 'end-1c'),
-                    corrective_action_text.get('1.0', 'end-1c'),
-                    orig_cm_number
-                ))
+                success, _, message = OptimisticConcurrencyControl.conditional_update(
+                    cursor, 'corrective_maintenance', orig_cm_number, orig_version,
+                    id_column='cm_number',
+                    changes={
+                        'bfm_equipment_no': bfm_var.get(),
+                        'description': description_text.get('1.0', 'end-1c'),
+                        'priority': priority_var.get(),
+                        'assigned_technician': assigned_var.get(),
+                        'status': status_var.get(),
+                        'labor_hours': float(labor_hours_var.get() or 0),
+                        'completion_date': completion_date_var.get() if completion_date_var.get() else None,
+                        'notes': notes_text.get('1.0', 'end-1c'),
+                        'root_cause': root_cause_text.get('1.0', 'end-1c'),
+                        'corrective_action': corrective_action_text.get('1.0', 'end-1c'),
+                    },
+                    updated_date_column=None,
+                )
+                if not success:
+                    self.conn.rollback()
+                    messagebox.showerror("Error", f"CM {orig_cm_number} was not saved.\n\n{message}")
+                    return
 
                 self.conn.commit()
                 messagebox.showinfo("Success", f"CM {orig_cm_number} updated successfully!")
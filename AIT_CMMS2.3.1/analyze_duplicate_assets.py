@@ -13,17 +13,34 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from database_utils import db_pool
 
-# Database configuration (same as AIT_CMMS_REV3.py)
-DB_CONFIG = {
-    'host': 'ep-tiny-paper-ad8glt26-pooler.c-2.us-east-1.aws.neon.tech',
-    'port': 5432,
-    'database': 'neondb',
-    'user': 'neondb_owner',
-    'password': 'npg_2Nm6hyPVWiIH',
-    'sslmode': 'require'
-}
-
-def analyze_duplicates():
+# Maximum number of BFM numbers per DELETE ... IN (...) statement
+DELETE_CHUNK_SIZE = 1000
+
+
+def sql_literal(value):
+    """Quote a value as a SQL string literal (single quotes doubled)."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+# Indexes that let the duplicate scan drive from the 'Missing' rows and
+# resolve both joins by index lookup
+DUPLICATE_SCAN_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_cannot_find_missing_bfm ON cannot_find_assets(bfm_equipment_no) WHERE status = 'Missing'",
+    "CREATE INDEX IF NOT EXISTS idx_deactivated_bfm ON deactivated_assets(bfm_equipment_no)",
+    "CREATE INDEX IF NOT EXISTS idx_equipment_bfm ON equipment(bfm_equipment_no)",
+]
+
+
+def ensure_indexes():
+    """Idempotently create the duplicate-scan indexes and refresh planner statistics."""
+    with db_pool.get_cursor() as cursor:
+        for statement in DUPLICATE_SCAN_INDEXES:
+            cursor.execute(statement)
+        for table in ("cannot_find_assets", "deactivated_assets", "equipment"):
+            cursor.execute(f"ANALYZE {table}")
+
+
+def analyze_duplicates(create_indexes=False):
     """Analyze assets that appear in both cannot_find and deactivated tables."""
 
     print("\n" + "="*120)
@@ -32,13 +49,24 @@ def analyze_duplicates():
     print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
 
     try:
-        # Initialize connection pool
-        print("Connecting to NEON cloud database...")
-        db_pool.initialize(DB_CONFIG, min_conn=1, max_conn=5)
+        # The SQLite pool needs no connection settings
+        print("Opening local SQLite database...")
+        db_pool.initialize()
         print("✓ Connected successfully\n")
 
-        # Query for duplicates
+        if create_indexes:
+            print("Ensuring duplicate-scan indexes exist...")
+            ensure_indexes()
+            print("✓ Indexes ready\n")
+
+        # Query for duplicates; the CTE narrows cannot_find_assets to the
+        # 'Missing' rows before the joins
         query = """
+        WITH cf AS (
+            SELECT bfm_equipment_no, location, reported_by, reported_date, status
+            FROM cannot_find_assets
+            WHERE status = 'Missing'
+        )
         SELECT
             cf.bfm_equipment_no,
             e.sap_material_no,
@@ -51,18 +79,50 @@ def analyze_duplicates():
             d.deactivated_date,
             d.reason as deactivation_reason,
             d.status as deactivated_status
-        FROM cannot_find_assets cf
+        FROM cf
         INNER JOIN deactivated_assets d ON cf.bfm_equipment_no = d.bfm_equipment_no
         LEFT JOIN equipment e ON cf.bfm_equipment_no = e.bfm_equipment_no
-        WHERE cf.status = 'Missing'
         ORDER BY cf.bfm_equipment_no;
         """
 
+        # Format each section once; the same text goes to the console and
+        # the report file, and each output is written with a single call
+        table_header = f"{'BFM Number':<15} {'SAP Number':<12} {'Description':<40} {'Deactivated Date':<17} {'Reason':<30}\n"
+        table_lines = []
+        detail_lines = []
+        duplicate_bfm_numbers = []
+
+        # Rows are formatted as the cursor yields them (one pass, no
+        # fetchall() copy of the result set)
         with db_pool.get_cursor() as cursor:
             cursor.execute(query)
-            results = cursor.fetchall()
+            for idx, row in enumerate(cursor, 1):
+                bfm_no = row['bfm_equipment_no'] or "N/A"
+                sap_no = row['sap_material_no'] or "N/A"
+                description = (row['description'] or "N/A")[:38]
+                deactivated_date = row['deactivated_date'] or "N/A"
+                reason = (row['deactivation_reason'] or "N/A")[:28]
 
-        if not results:
+                table_lines.append(f"{bfm_no:<15} {sap_no:<12} {description:<40} {deactivated_date:<17} {reason:<30}\n")
+                duplicate_bfm_numbers.append(bfm_no)
+
+                detail_lines.append(
+                    f"\n[{idx}] BFM Number: {row['bfm_equipment_no']}\n"
+                    f"    SAP Number: {row['sap_material_no'] or 'N/A'}\n"
+                    f"    Description: {row['description'] or 'N/A'}\n"
+                    f"    ---\n"
+                    f"    Cannot Find Location: {row['cannot_find_location'] or 'N/A'}\n"
+                    f"    Reported By: {row['reported_by'] or 'N/A'}\n"
+                    f"    Reported Date: {row['reported_date'] or 'N/A'}\n"
+                    f"    Cannot Find Status: {row['cannot_find_status'] or 'N/A'}\n"
+                    f"    ---\n"
+                    f"    Deactivated By: {row['deactivated_by'] or 'N/A'}\n"
+                    f"    Deactivated Date: {row['deactivated_date'] or 'N/A'}\n"
+                    f"    Deactivation Reason: {row['deactivation_reason'] or 'N/A'}\n"
+                    f"    Deactivated Status: {row['deactivated_status'] or 'N/A'}\n"
+                )
+
+        if not duplicate_bfm_numbers:
             print("✓ NO DUPLICATES FOUND!")
             print("="*120)
             print("\nAll Cannot Find assets are properly separated from Deactivated assets.")
@@ -70,119 +130,63 @@ def analyze_duplicates():
             return []
 
         # Print summary
-        print(f"⚠ FOUND {len(results)} DUPLICATE ASSET(S)")
+        print(f"⚠ FOUND {len(duplicate_bfm_numbers)} DUPLICATE ASSET(S)")
         print("="*120)
         print("\nThese assets are in BOTH the Cannot Find list AND the Deactivated list.")
         print("Recommendation: Remove them from the Cannot Find list.\n")
 
-        # Print table
-        print(f"{'BFM Number':<15} {'SAP Number':<12} {'Description':<40} {'Deactivated Date':<17} {'Reason':<30}")
-        print("-"*120)
-
-        duplicate_bfm_numbers = []
-
-        for row in results:
-            bfm_no = row['bfm_equipment_no'] or "N/A"
-            sap_no = row['sap_material_no'] or "N/A"
-            description = (row['description'] or "N/A")[:38]
-            deactivated_date = row['deactivated_date'] or "N/A"
-            reason = (row['deactivation_reason'] or "N/A")[:28]
+        bfm_lines = [f"  {bfm}\n" for bfm in duplicate_bfm_numbers]
+        rule = "="*120 + "\n"
 
-            print(f"{bfm_no:<15} {sap_no:<12} {description:<40} {deactivated_date:<17} {reason:<30}")
-            duplicate_bfm_numbers.append(bfm_no)
-
-        # Print detailed information
-        print("\n" + "="*120)
-        print("DETAILED INFORMATION")
-        print("="*120)
-
-        for idx, row in enumerate(results, 1):
-            print(f"\n[{idx}] BFM Number: {row['bfm_equipment_no']}")
-            print(f"    SAP Number: {row['sap_material_no'] or 'N/A'}")
-            print(f"    Description: {row['description'] or 'N/A'}")
-            print(f"    ---")
-            print(f"    Cannot Find Location: {row['cannot_find_location'] or 'N/A'}")
-            print(f"    Reported By: {row['reported_by'] or 'N/A'}")
-            print(f"    Reported Date: {row['reported_date'] or 'N/A'}")
-            print(f"    Cannot Find Status: {row['cannot_find_status'] or 'N/A'}")
-            print(f"    ---")
-            print(f"    Deactivated By: {row['deactivated_by'] or 'N/A'}")
-            print(f"    Deactivated Date: {row['deactivated_date'] or 'N/A'}")
-            print(f"    Deactivation Reason: {row['deactivation_reason'] or 'N/A'}")
-            print(f"    Deactivated Status: {row['deactivated_status'] or 'N/A'}")
-
-        # Print BFM numbers list
-        print("\n" + "="*120)
-        print("BFM NUMBERS TO REMOVE FROM 'CANNOT FIND' LIST")
-        print("="*120)
-        print("\nCopy this list:\n")
-        for bfm in duplicate_bfm_numbers:
-            print(f"  {bfm}")
+        # Print table, detailed information and BFM numbers list
+        sys.stdout.write("".join([
+            table_header, "-"*120 + "\n", *table_lines,
+            "\n", rule, "DETAILED INFORMATION\n", rule, *detail_lines,
+            "\n", rule, "BFM NUMBERS TO REMOVE FROM 'CANNOT FIND' LIST\n", rule,
+            "\nCopy this list:\n\n", *bfm_lines,
+        ]))
 
         # Save to file
         output_file = f"duplicate_assets_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-        with open(output_file, 'w') as f:
-            f.write("="*120 + "\n")
-            f.write("ASSETS FOUND IN BOTH 'CANNOT FIND' AND 'DEACTIVATED' LISTS\n")
-            f.write("="*120 + "\n")
-            f.write(f"Report Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Total duplicates found: {len(results)}\n\n")
-
-            f.write(f"{'BFM Number':<15} {'SAP Number':<12} {'Description':<40} {'Deactivated Date':<17} {'Reason':<30}\n")
-            f.write("-"*120 + "\n")
-
-            for row in results:
-                bfm_no = row['bfm_equipment_no'] or "N/A"
-                sap_no = row['sap_material_no'] or "N/A"
-                description = (row['description'] or "N/A")[:38]
-                deactivated_date = row['deactivated_date'] or "N/A"
-                reason = (row['deactivation_reason'] or "N/A")[:28]
-                f.write(f"{bfm_no:<15} {sap_no:<12} {description:<40} {deactivated_date:<17} {reason:<30}\n")
-
-            f.write("\n" + "="*120 + "\n")
-            f.write("DETAILED INFORMATION\n")
-            f.write("="*120 + "\n")
-
-            for idx, row in enumerate(results, 1):
-                f.write(f"\n[{idx}] BFM Number: {row['bfm_equipment_no']}\n")
-                f.write(f"    SAP Number: {row['sap_material_no'] or 'N/A'}\n")
-                f.write(f"    Description: {row['description'] or 'N/A'}\n")
-                f.write(f"    ---\n")
-                f.write(f"    Cannot Find Location: {row['cannot_find_location'] or 'N/A'}\n")
-                f.write(f"    Reported By: {row['reported_by'] or 'N/A'}\n")
-                f.write(f"    Reported Date: {row['reported_date'] or 'N/A'}\n")
-                f.write(f"    Cannot Find Status: {row['cannot_find_status'] or 'N/A'}\n")
-                f.write(f"    ---\n")
-                f.write(f"    Deactivated By: {row['deactivated_by'] or 'N/A'}\n")
-                f.write(f"    Deactivated Date: {row['deactivated_date'] or 'N/A'}\n")
-                f.write(f"    Deactivation Reason: {row['deactivation_reason'] or 'N/A'}\n")
-                f.write(f"    Deactivated Status: {row['deactivated_status'] or 'N/A'}\n")
-
-            f.write("\n" + "="*120 + "\n")
-            f.write("BFM NUMBERS TO REMOVE FROM 'CANNOT FIND' LIST\n")
-            f.write("="*120 + "\n\n")
-            for bfm in duplicate_bfm_numbers:
-                f.write(f"  {bfm}\n")
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write("".join([
+                rule, "ASSETS FOUND IN BOTH 'CANNOT FIND' AND 'DEACTIVATED' LISTS\n", rule,
+                f"Report Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
+                f"Total duplicates found: {len(duplicate_bfm_numbers)}\n\n",
+                table_header, "-"*120 + "\n", *table_lines,
+                "\n", rule, "DETAILED INFORMATION\n", rule, *detail_lines,
+                "\n", rule, "BFM NUMBERS TO REMOVE FROM 'CANNOT FIND' LIST\n", rule, "\n", *bfm_lines,
+            ]))
 
         print(f"\n✓ Full report saved to: {output_file}")
 
         # Generate cleanup SQL
         sql_file = f"cleanup_duplicate_assets_{datetime.now().strftime('%Y%m%d_%H%M%S')}.sql"
-        with open(sql_file, 'w') as f:
-            f.write("-- SQL Script to Remove Duplicate Assets from Cannot Find List\n")
-            f.write(f"-- Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"-- Total assets to remove: {len(duplicate_bfm_numbers)}\n\n")
-            f.write("-- BACKUP FIRST: Create a backup of cannot_find_assets table\n")
-            f.write("-- CREATE TABLE cannot_find_assets_backup AS SELECT * FROM cannot_find_assets;\n\n")
-            f.write("BEGIN;\n\n")
-
-            for bfm in duplicate_bfm_numbers:
-                f.write(f"DELETE FROM cannot_find_assets WHERE bfm_equipment_no = '{bfm}';\n")
-
-            f.write("\n-- Review the changes before committing\n")
-            f.write("-- If everything looks good, run: COMMIT;\n")
-            f.write("-- If you want to undo, run: ROLLBACK;\n\n")
-            f.write("-- COMMIT;\n")
+        sql_parts = [
+            "-- SQL Script to Remove Duplicate Assets from Cannot Find List\n",
+            f"-- Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
+            f"-- Total assets to remove: {len(duplicate_bfm_numbers)}\n\n",
+            "-- BACKUP FIRST: Create a backup of cannot_find_assets table\n",
+            "-- CREATE TABLE cannot_find_assets_backup AS SELECT * FROM cannot_find_assets;\n\n",
+            "BEGIN;\n\n",
+        ]
+
+        # One DELETE per chunk instead of one per asset; values are quoted
+        # as SQL literals rather than pasted into the statement
+        for start in range(0, len(duplicate_bfm_numbers), DELETE_CHUNK_SIZE):
+            chunk = duplicate_bfm_numbers[start:start + DELETE_CHUNK_SIZE]
+            sql_parts.append("DELETE FROM cannot_find_assets WHERE bfm_equipment_no IN (\n    ")
+            sql_parts.append(",\n    ".join(sql_literal(bfm) for bfm in chunk))
+            sql_parts.append("\n);\n")
+
+        sql_parts.append(
+            "\n-- Review the changes before committing\n"
+            "-- If everything looks good, run: COMMIT;\n"
+            "-- If you want to undo, run: ROLLBACK;\n\n"
+            "-- COMMIT;\n"
+        )
+        with open(sql_file, 'w', encoding='utf-8') as f:
+            f.write("".join(sql_parts))
 
         print(f"✓ SQL cleanup script saved to: {sql_file}")
         print("\n⚠️  IMPORTANT: Review the SQL file before executing!")
@@ -212,9 +216,10 @@ if __name__ == "__main__":
     print("DUPLICATE ASSET ANALYZER")
     print("="*120)
     print("\nSearching for assets in both CANNOT FIND and DEACTIVATED lists...")
-    print("This will identify duplicates that should be removed from the Cannot Find list.\n")
+    print("This will identify duplicates that should be removed from the Cannot Find list.")
+    print("Pass --ensure-indexes to create the supporting indexes first.\n")
 
-    duplicates = analyze_duplicates()
+    duplicates = analyze_duplicates(create_indexes="--ensure-indexes" in sys.argv[1:])
 
     if not duplicates:
         print("✓ Analysis complete - no cleanup needed!\n")
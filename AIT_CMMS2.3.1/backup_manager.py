@@ -1,41 +1,144 @@
 """
 Backup Manager Module – SQLite edition
 Handles automated database backups for the SQLite CMMS database.
-- JSON+gzip backup format (platform-independent)
+- Compressed SQLite snapshot (default) or compressed NDJSON (platform-independent)
+- zstandard compression when the package is installed, gzip otherwise
 - Backup rotation and retention
 - Restore capabilities
 """
 
+import io
 import os
 import gzip
 import json
+import queue
 import sqlite3
 import shutil
+import tempfile
 import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import chain, islice
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 import hashlib
 
+try:
+    import zstandard as zstd
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from blake3 import blake3 as _blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
 BACKUP_FILE_EXTENSION = ".cmmsbackup"
 _DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cmms_data.db")
 
-
-def _serialize_value(v):
-    if v is None or isinstance(v, (bool, int, float, str)):
-        return v
-    if isinstance(v, bytes):
+_SQLITE_MAGIC = b"SQLite format 3\x00"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_GZIP_MAGIC = b"\x1f\x8b"
+# Sidecar file holding "<algorithm> <hexdigest>" of the compressed backup
+_DIGEST_SUFFIX = ".digest"
+# File buffer / chunk size used when streaming backups through the compressor
+_COPY_BUFFER_SIZE = 1 << 20
+
+# Databases up to this size are snapshotted in memory with serialize()
+_SERIALIZE_MAX_BYTES = 256 * 1024 * 1024
+
+# Append-only JSONL log of backup operations, kept in the backup directory;
+# trimmed to the newest entries once it outgrows _BACKUP_LOG_MAX_BYTES
+_BACKUP_LOG_FILE = "backup_log.jsonl"
+_BACKUP_LOG_MAX_ENTRIES = 1000
+_BACKUP_LOG_MAX_BYTES = 1 << 20
+
+# Idle connections kept by BackupManager for reuse
+_CONNECTION_POOL_SIZE = 4
+
+# Rows fetched per round-trip when streaming a table into the backup file
+_FETCH_BATCH_SIZE = 10000
+# Upper bound on rows per multi-row INSERT when restoring a table
+_INSERT_BATCH_SIZE = 1000
+# Host parameters per statement; 999 is the lowest limit across SQLite builds
+_MAX_SQL_VARIABLES = 999
+
+# First bytes of an NDJSON backup; older JSON backups are a single document
+_NDJSON_HEADER_PREFIX = b'{"format":"ndjson"'
+
+# Prefix of the working files a backup writes into the backup directory.
+# Files left behind by a crashed backup are removed by cleanup_old_backups
+# once they are older than _STALE_TEMP_SECONDS (so a running backup's
+# files are never touched).
+_TEMP_PREFIX = ".cmms_tmp_"
+_STALE_TEMP_SECONDS = 24 * 60 * 60
+
+
+def _json_default(v):
+    """Encoder fallback for cell types JSON can't hold: BLOBs become tagged hex, anything else str()"""
+    if type(v) is bytes:
         return {'_t': 'bytes', 'v': v.hex()}
     return str(v)
 
 
+# Row tuples are encoded as-is; only cells the encoder can't handle reach
+# _json_default, so there is no per-cell Python work on the dump path
+if ORJSON_AVAILABLE:
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=_json_default)
+
+    _json_loads = orjson.loads
+else:
+    _json_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_json_default).encode
+
+    def _json_dumps(obj) -> bytes:
+        return _json_encode(obj).encode('utf-8')
+
+    _json_loads = json.loads
+
+
+def _new_hasher(algorithm: Optional[str] = None):
+    """BLAKE3 when installed, otherwise stdlib BLAKE2b"""
+    if algorithm is None:
+        algorithm = "blake3" if BLAKE3_AVAILABLE else "blake2b"
+    if algorithm == "blake3":
+        return _blake3()
+    return hashlib.new(algorithm)
+
+
+class _HashingWriter:
+    """File-like wrapper that feeds every written chunk to a hash object"""
+
+    def __init__(self, raw, hasher):
+        self._raw = raw
+        self._hasher = hasher
+
+    def write(self, data):
+        self._hasher.update(data)
+        return self._raw.write(data)
+
+    def flush(self):
+        self._raw.flush()
+
+
 def _deserialize_value(v):
-    if isinstance(v, dict) and '_t' in v:
-        t, val = v['_t'], v['v']
-        if t == 'bytes':
-            return bytes.fromhex(val)
-    if isinstance(v, (dict, list)):
+    t = type(v)
+    if t is dict:
+        if v.get('_t') == 'bytes':
+            return bytes.fromhex(v['v'])
+        return json.dumps(v, ensure_ascii=False, default=str)
+    if t is list:
         return json.dumps(v, ensure_ascii=False, default=str)
     return v
 
@@ -43,8 +146,17 @@ def _deserialize_value(v):
 class BackupManager:
     """Manages SQLite database backups"""
 
-    def __init__(self, pool=None, backup_dir: Optional[str] = None):
+    def __init__(self, pool=None, backup_dir: Optional[str] = None, compresslevel: int = 1,
+                 compression: Optional[str] = None):
         self.pool = pool
+        # Level 1 is several times faster than gzip's default 9 for a
+        # modest size cost; backups are CPU-bound in the compressor
+        self.config = {'schedule': 'daily', 'retention_days': 30,
+                       'compression': self._resolve_compression(compression),
+                       'compression_level': compresslevel,
+                       # Hash backups as they are written and check the hash
+                       # before restoring; False skips both
+                       'verify_checksum': True}
         self.db_path = _DB_FILE
         self.using_fallback_location = False
         if backup_dir:
@@ -58,87 +170,327 @@ class BackupManager:
             self.backup_dir.mkdir(parents=True, exist_ok=True)
             self.using_fallback_location = True
         self._lock = threading.Lock()
-        self.config = {'schedule': 'daily', 'retention_days': 30}
-        self._backup_log: List[Dict] = []
+        self._list_cache: List[Tuple[Dict, float]] = []
+        self._list_cache_key: Optional[int] = None
+        self._schema_columns_cache: Optional[Tuple[Tuple[str, int], Dict[str, set]]] = None
+        self._log_index: Dict[str, Dict] = {}
+        self._log_index_key: Optional[Tuple[int, int]] = None
+        self._conn_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=_CONNECTION_POOL_SIZE)
+
+    @staticmethod
+    def _resolve_compression(compression: Optional[str]) -> str:
+        """'zstd' or 'gzip'; None picks zstd when the zstandard package is installed"""
+        if compression is None:
+            compression = "zstd" if ZSTD_AVAILABLE else "gzip"
+        if compression == "zstd" and not ZSTD_AVAILABLE:
+            print("zstandard not installed. Falling back to gzip backups.")
+            compression = "gzip"
+        if compression not in ("zstd", "gzip"):
+            raise ValueError(f"Unsupported backup compression: {compression}")
+        return compression
+
+    @property
+    def compression(self) -> str:
+        return self.config['compression']
+
+    @property
+    def compresslevel(self) -> int:
+        return self.config['compression_level']
 
     def _get_connection(self):
-        """Get a direct SQLite connection"""
+        """Get a SQLite connection, reusing an idle pooled one when available"""
+        try:
+            return self._conn_pool.get_nowait()
+        except queue.Empty:
+            pass
         conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
         conn.row_factory = sqlite3.Row
+        # Read-heavy tuning for snapshot/dump scans: 256 MB memory map,
+        # 64 MB page cache, temp tables in memory
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA temp_store=MEMORY")
         return conn
 
+    def _release_connection(self, conn) -> None:
+        """Return a connection to the pool, closing it if the pool is full"""
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._conn_pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    @contextmanager
+    def _borrow_connection(self):
+        """Pooled connection for a with-block; discarded rather than reused if the block fails"""
+        conn = self._get_connection()
+        try:
+            yield conn
+        except Exception:
+            conn.close()
+            raise
+        self._release_connection(conn)
+
+    @staticmethod
+    def _set_journal_mode(cur, mode: str) -> None:
+        """Switch journal mode, leaving it unchanged if other connections hold the database"""
+        try:
+            cur.execute(f"PRAGMA journal_mode={mode}")
+        except sqlite3.OperationalError as e:
+            print(f"Could not set journal_mode={mode}: {e}")
+
     def _get_all_tables(self, conn) -> List[str]:
         """Get list of all user tables in the database"""
         cur = conn.cursor()
         cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name")
         return [row[0] for row in cur.fetchall()]
 
-    def create_backup(self, backup_name: Optional[str] = None, notes: str = "") -> Tuple[bool, str]:
+    def create_backup(self, backup_name: Optional[str] = None, notes: str = "",
+                      format: str = "sqlite") -> Tuple[bool, str, str]:
         """
-        Create a database backup as a gzip-compressed JSON file.
+        Create a database backup.
+
+        format="sqlite" (default) stores a compressed snapshot of the
+        database file taken with the SQLite Online Backup API.
+        format="json" stores a compressed, platform-independent JSON
+        dump of every table.
 
-        Returns (success, message_or_filepath)
+        Returns (success, filepath, message)
         """
-        with self._lock:
+        tmp_paths = []
+        try:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            if not backup_name:
+                backup_name = f"cmms_backup_{timestamp}"
+
+            backup_path = self.backup_dir / f"{backup_name}{BACKUP_FILE_EXTENSION}"
+            digest_path = str(backup_path) + _DIGEST_SUFFIX
+
+            # The backup is written to a temporary name so concurrent backups
+            # never see each other's partial files; only the rename into
+            # place is serialized
+            fd, tmp_path = tempfile.mkstemp(prefix=_TEMP_PREFIX, suffix=".tmp", dir=str(self.backup_dir))
+            os.close(fd)
+            tmp_paths.append(tmp_path)
+            hasher = _new_hasher() if self.config.get('verify_checksum', True) else None
+            if format == "json":
+                detail = self._write_json_backup(Path(tmp_path), notes, hasher)
+            else:
+                detail = self._write_sqlite_backup(Path(tmp_path), hasher)
+            if hasher is not None:
+                tmp_digest_path = tmp_path + _DIGEST_SUFFIX
+                tmp_paths.append(tmp_digest_path)
+                with open(tmp_digest_path, 'w') as f:
+                    f.write(f"{hasher.name} {hasher.hexdigest()}\n")
+
+            with self._lock:
+                os.replace(tmp_path, backup_path)
+                if hasher is not None:
+                    os.replace(tmp_digest_path, digest_path)
+                elif os.path.exists(digest_path):
+                    # Don't leave a digest of a backup this one replaced
+                    os.remove(digest_path)
+                tmp_paths.clear()
+
+            size = backup_path.stat().st_size
+            msg = f"{size:,} bytes, {detail}"
+            print(f"Backup created: {backup_path.name} ({msg})")
+            self._log_backup({'backup_file': backup_path.name, 'status': 'success',
+                              'message': msg, 'file_size': size,
+                              'timestamp': datetime.now().isoformat()})
+            self._list_cache_key = None
+            return True, str(backup_path), msg
+
+        except Exception as e:
+            print(f"Backup failed: {e}")
+            for path in tmp_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            return False, "", str(e)
+
+    def _snapshot_database(self, snapshot_path: str) -> List[str]:
+        """Copy the live database to snapshot_path with the Online Backup API; returns its tables"""
+        with self._borrow_connection() as conn:
+            tables = self._get_all_tables(conn)
+            snapshot_conn = sqlite3.connect(snapshot_path)
             try:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                if not backup_name:
-                    backup_name = f"cmms_backup_{timestamp}"
+                conn.backup(snapshot_conn)
+            finally:
+                snapshot_conn.close()
+        return tables
+
+    def _write_sqlite_backup(self, backup_path: Path, hasher) -> str:
+        """Snapshot the database and compress it"""
+        # serialize() (Python 3.11+) copies the database image into memory in
+        # one read transaction, skipping the temporary snapshot file
+        image = None
+        with self._borrow_connection() as conn:
+            if hasattr(conn, "serialize"):
+                page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+                page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+                if page_count * page_size <= _SERIALIZE_MAX_BYTES:
+                    tables = self._get_all_tables(conn)
+                    image = conn.serialize()
+        if image is not None:
+            with self._open_compressed_writer(backup_path, hasher) as gz:
+                gz.write(image)
+            return f"SQLite snapshot of {len(tables)} tables"
+
+        # Large databases go through the Online Backup API to a temporary file
+        fd, snapshot_path = tempfile.mkstemp(prefix=_TEMP_PREFIX, suffix=".db", dir=str(self.backup_dir))
+        os.close(fd)
+        try:
+            tables = self._snapshot_database(snapshot_path)
+            with open(snapshot_path, 'rb', buffering=_COPY_BUFFER_SIZE) as src, \
+                    self._open_compressed_writer(backup_path, hasher) as gz:
+                shutil.copyfileobj(src, gz, _COPY_BUFFER_SIZE)
+        finally:
+            os.remove(snapshot_path)
 
-                backup_path = self.backup_dir / f"{backup_name}{BACKUP_FILE_EXTENSION}"
+        return f"SQLite snapshot of {len(tables)} tables"
 
-                conn = self._get_connection()
-                try:
-                    tables = self._get_all_tables(conn)
-                    backup_data = {
-                        "version": "2.3.1",
-                        "backup_date": datetime.now().isoformat(),
-                        "notes": notes,
-                        "tables": {}
-                    }
-
-                    for table in tables:
-                        cur = conn.cursor()
-                        cur.execute(f"SELECT * FROM {table}")
-                        columns = [desc[0] for desc in cur.description]
-                        rows = []
-                        for row in cur.fetchall():
-                            row_dict = {}
-                            for i, col in enumerate(columns):
-                                row_dict[col] = _serialize_value(row[i])
-                            rows.append(row_dict)
-                        backup_data["tables"][table] = {
-                            "columns": columns,
-                            "rows": rows,
-                            "count": len(rows)
-                        }
-
-                    # Also create a raw SQLite file copy
-                    raw_backup_path = str(backup_path) + ".db"
-                    backup_conn = sqlite3.connect(raw_backup_path)
-                    conn.backup(backup_conn)
-                    backup_conn.close()
+    def _write_json_backup(self, backup_path: Path, notes: str, hasher) -> str:
+        """
+        Dump every table into a compressed NDJSON file.
 
-                finally:
-                    conn.close()
-
-                # Write compressed JSON backup
-                json_data = json.dumps(backup_data, ensure_ascii=False, default=str)
-                with gzip.open(str(backup_path), 'wt', encoding='utf-8') as f:
-                    f.write(json_data)
-
-                size = backup_path.stat().st_size
-                total_rows = sum(t["count"] for t in backup_data["tables"].values())
-                msg = f"{size:,} bytes, {total_rows:,} rows across {len(backup_data['tables'])} tables"
-                print(f"Backup created: {backup_path.name} ({msg})")
-                self._backup_log.append({'backup_file': backup_path.name, 'status': 'success',
-                                         'message': msg, 'file_size': size,
-                                         'timestamp': datetime.now().isoformat()})
-                return True, str(backup_path), msg
-
-            except Exception as e:
-                print(f"Backup failed: {e}")
-                return False, "", str(e)
+        The first line holds the backup metadata; each table is then a
+        '{"_table": name, "columns": [...]}' line followed by one JSON value
+        list per row, so restore can stream the file line by line.
+
+        Tables are read from a private snapshot (so the dump is consistent)
+        by a thread pool; each worker compresses its table into a separate
+        fragment and the fragments are concatenated in table order. gzip
+        members and zstd frames both decode as one continuous stream.
+        """
+        fd, snapshot_path = tempfile.mkstemp(prefix=_TEMP_PREFIX, suffix=".db", dir=str(self.backup_dir))
+        os.close(fd)
+        fragment_paths: List[str] = []
+        try:
+            tables = self._snapshot_database(snapshot_path)
+            for _ in tables:
+                fd, fragment_path = tempfile.mkstemp(prefix=_TEMP_PREFIX, suffix=".part",
+                                                     dir=str(self.backup_dir))
+                os.close(fd)
+                fragment_paths.append(fragment_path)
+
+            workers = max(1, min(len(tables), os.cpu_count() or 1, 8))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(self._dump_table, snapshot_path, table, fragment_path)
+                           for table, fragment_path in zip(tables, fragment_paths)]
+                total_rows = sum(f.result() for f in futures)
+
+            header = _NDJSON_HEADER_PREFIX + b',"version":"2.3.1","backup_date":%s,"notes":%s}\n' % (
+                _json_dumps(datetime.now().isoformat()), _json_dumps(notes))
+            with open(backup_path, 'wb', buffering=_COPY_BUFFER_SIZE) as raw:
+                out = raw if hasher is None else _HashingWriter(raw, hasher)
+                out.write(self._compress_bytes(header))
+                for fragment_path in fragment_paths:
+                    with open(fragment_path, 'rb') as src:
+                        shutil.copyfileobj(src, out, _COPY_BUFFER_SIZE)
+        finally:
+            for path in fragment_paths + [snapshot_path]:
+                os.remove(path)
+
+        return f"{total_rows:,} rows across {len(tables)} tables"
+
+    def _dump_table(self, snapshot_path: str, table: str, fragment_path: str) -> int:
+        """Stream one table as a compressed NDJSON fragment; returns its row count"""
+        conn = sqlite3.connect(snapshot_path)
+        try:
+            cur = conn.cursor()
+            cur.execute(f"SELECT * FROM {table}")
+            columns = [desc[0] for desc in cur.description]
+
+            # Rows are fetched in batches so memory stays bounded by _FETCH_BATCH_SIZE
+            with self._open_compressed_writer(fragment_path) as f:
+                write = f.write
+                dumps = _json_dumps
+                write(b'{"_table":%s,"columns":%s}\n' % (dumps(table), dumps(columns)))
+
+                count = 0
+                while True:
+                    rows = cur.fetchmany(_FETCH_BATCH_SIZE)
+                    if not rows:
+                        break
+                    # One write per batch keeps compressor calls off the per-row path
+                    write(b'\n'.join([dumps(row) for row in rows]))
+                    write(b'\n')
+                    count += len(rows)
+        finally:
+            conn.close()
+        return count
+
+    def _compress_bytes(self, data: bytes) -> bytes:
+        """Compress a small payload as a standalone gzip member / zstd frame"""
+        if self.compression == "zstd":
+            return zstd.ZstdCompressor(level=self.compresslevel).compress(data)
+        return gzip.compress(data, compresslevel=self.compresslevel)
+
+    @contextmanager
+    def _open_compressed_writer(self, backup_path: Path, hasher=None):
+        """Binary compressor stream over a 1 MiB-buffered output file; hasher sees the compressed bytes"""
+        with open(backup_path, 'wb', buffering=_COPY_BUFFER_SIZE) as raw:
+            sink = raw if hasher is None else _HashingWriter(raw, hasher)
+            if self.compression == "zstd":
+                cctx = zstd.ZstdCompressor(level=self.compresslevel, threads=-1)
+                with cctx.stream_writer(sink, closefd=False) as zw:
+                    yield zw
+            else:
+                with gzip.GzipFile(fileobj=sink, mode='wb', compresslevel=self.compresslevel) as gz:
+                    yield gz
+
+    @staticmethod
+    @contextmanager
+    def _open_compressed_reader(path):
+        """Binary decompressor stream; zstd or gzip is picked from the file's magic bytes"""
+        with open(path, 'rb', buffering=_COPY_BUFFER_SIZE) as raw:
+            magic = raw.read(len(_ZSTD_MAGIC))
+            raw.seek(0)
+            if magic == _ZSTD_MAGIC:
+                if not ZSTD_AVAILABLE:
+                    raise RuntimeError("Backup is zstd-compressed; install the 'zstandard' package to read it")
+                with zstd.ZstdDecompressor().stream_reader(raw, read_across_frames=True,
+                                                           closefd=False) as zr:
+                    # Buffered so callers can readline() / iterate lines
+                    yield io.BufferedReader(zr, _COPY_BUFFER_SIZE)
+            else:
+                with gzip.GzipFile(fileobj=raw, mode='rb') as gz:
+                    yield gz
+
+    @staticmethod
+    def _verify_digest(path: Path) -> None:
+        """Re-hash the backup file and compare with its digest sidecar, if there is one"""
+        digest_path = str(path) + _DIGEST_SUFFIX
+        if not os.path.exists(digest_path):
+            return
+        with open(digest_path) as f:
+            algorithm, expected = f.read().split()
+        if algorithm == "blake3" and not BLAKE3_AVAILABLE:
+            print("blake3 not installed. Skipping backup checksum verification.")
+            return
+        hasher = _new_hasher(algorithm)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_COPY_BUFFER_SIZE), b''):
+                hasher.update(chunk)
+        if hasher.hexdigest() != expected:
+            raise ValueError(f"Checksum mismatch for {path.name}: the backup file is corrupt or was modified")
+
+    def _is_sqlite_backup(self, path) -> bool:
+        """True if the compressed payload is a raw SQLite database rather than JSON"""
+        with self._open_compressed_reader(path) as f:
+            return f.read(len(_SQLITE_MAGIC)) == _SQLITE_MAGIC
+
+    def _decompress_to_temp(self, path) -> str:
+        """Decompress a SQLite-format backup into a temporary .db file and return its path"""
+        fd, tmp_path = tempfile.mkstemp(suffix=".db", dir=os.path.dirname(self.db_path))
+        try:
+            with self._open_compressed_reader(path) as src, os.fdopen(fd, 'wb') as dst:
+                shutil.copyfileobj(src, dst, _COPY_BUFFER_SIZE)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        return tmp_path
 
     def restore_backup(self, backup_path: str, confirm: bool = False) -> Tuple[bool, str]:
         """
@@ -146,150 +498,430 @@ class BackupManager:
 
         Returns (success, message)
         """
-        with self._lock:
-            try:
-                path = Path(backup_path)
-                if not path.exists():
-                    return False, f"Backup file not found: {backup_path}"
-
-                # Try raw .db backup first
-                raw_path = str(path) + ".db"
-                if os.path.exists(raw_path):
-                    shutil.copy2(raw_path, self.db_path)
-                    print(f"Database restored from: {raw_path}")
-                    return True, "Database restored successfully from SQLite backup."
+        # Checksum verification and decompression run unlocked; the lock
+        # only covers the phases that write to the live database
+        try:
+            path = Path(backup_path)
+            if not path.exists():
+                return False, f"Backup file not found: {backup_path}"
 
-                # Otherwise restore from JSON backup
-                with gzip.open(str(path), 'rt', encoding='utf-8') as f:
-                    backup_data = json.load(f)
+            if self.config.get('verify_checksum', True):
+                self._verify_digest(path)
 
-                conn = self._get_connection()
+            # SQLite snapshot: copy its pages over the live database
+            if self._is_sqlite_backup(path):
+                tmp_path = self._decompress_to_temp(path)
                 try:
-                    cur = conn.cursor()
-                    cur.execute("PRAGMA foreign_keys=OFF")
-
-                    # Support tables stored as a dict {name: data} or a list [{name, columns, rows}]
-                    tables_raw = backup_data["tables"]
-                    if isinstance(tables_raw, list):
-                        tables_iter = {t["name"]: t for t in tables_raw}.items()
-                    else:
-                        tables_iter = tables_raw.items()
-
-                    for table_name, table_data in tables_iter:
-                        # Skip tables that don't exist in the current schema
-                        cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
-                        if not cur.fetchone():
-                            print(f"Skipping table {table_name}: not in current schema")
-                            continue
-
-                        cur.execute(f"DELETE FROM {table_name}")
-
-                        # Support table_data as dict {columns, rows} or directly as a list of rows
-                        if isinstance(table_data, dict):
-                            columns = table_data["columns"]
-                            rows = table_data["rows"]
-                        else:
-                            # table_data is the rows list; infer columns from first row if dict
-                            rows = table_data
-                            if rows and isinstance(rows[0], dict):
-                                columns = list(rows[0].keys())
-                            else:
-                                print(f"Skipping table {table_name}: cannot infer columns")
-                                continue
-
-                        # Filter to only columns that exist in the current table
-                        cur.execute(f"PRAGMA table_info({table_name})")
-                        existing_columns = {row[1] for row in cur.fetchall()}
-                        valid_indices = [i for i, c in enumerate(columns) if c in existing_columns]
-                        valid_columns = [columns[i] for i in valid_indices]
-
-                        if not valid_columns:
-                            print(f"Skipping table {table_name}: no matching columns")
-                            continue
-
-                        placeholders = ",".join(["?" for _ in valid_columns])
-                        col_names = ",".join(valid_columns)
-
-                        for row_data in rows:
-                            if isinstance(row_data, dict):
-                                values = [_deserialize_value(row_data.get(col)) for col in valid_columns]
-                            else:
-                                values = [_deserialize_value(row_data[i]) for i in valid_indices]
-                            cur.execute(
-                                f"INSERT OR REPLACE INTO {table_name} ({col_names}) VALUES ({placeholders})",
-                                values
-                            )
-
-                    cur.execute("PRAGMA foreign_keys=ON")
-                    conn.commit()
+                    src_conn = sqlite3.connect(tmp_path)
+                    try:
+                        with self._lock, self._borrow_connection() as conn:
+                            src_conn.backup(conn)
+                    finally:
+                        src_conn.close()
                 finally:
-                    conn.close()
+                    os.remove(tmp_path)
+                print(f"Database restored from SQLite backup: {path.name}")
+                return True, "Database restored successfully from SQLite backup."
+
+            # Backups from older versions kept a raw .db copy alongside
+            raw_path = str(path) + ".db"
+            if os.path.exists(raw_path):
+                with self._lock:
+                    shutil.copy2(raw_path, self.db_path)
+                print(f"Database restored from: {raw_path}")
+                return True, "Database restored successfully from SQLite backup."
+
+            # Otherwise restore from a JSON backup; NDJSON is streamed line
+            # by line, older single-document backups are parsed whole
+            with self._open_compressed_reader(path) as f:
+                first_line = f.readline()
+                if first_line.startswith(_NDJSON_HEADER_PREFIX):
+                    with self._lock:
+                        self._restore_json_tables(self._iter_ndjson_tables(f))
+                else:
+                    backup_data = self._read_json_document(first_line, f)
+                    with self._lock:
+                        self._restore_json_tables(self._iter_json_tables(backup_data))
+
+            print(f"Database restored from JSON backup: {path.name}")
+            return True, "Database restored successfully."
 
-                print(f"Database restored from JSON backup: {path.name}")
-                return True, "Database restored successfully."
+        except Exception as e:
+            print(f"Restore failed: {e}")
+            return False, str(e)
 
-            except Exception as e:
-                print(f"Restore failed: {e}")
-                return False, str(e)
+    @staticmethod
+    def _iter_ndjson_tables(f):
+        """
+        Yield (table, columns, rows) for each table section of an NDJSON backup.
 
-    def list_backups(self) -> List[Dict]:
-        """List all available backups"""
-        backups = []
-        for f in self.backup_dir.glob(f"*{BACKUP_FILE_EXTENSION}"):
+        rows lazily parses the lines up to the next table header; whatever
+        the caller leaves unread is skipped before the next table is yielded.
+        """
+        loads = _json_loads
+        lines = iter(f)
+        header = None
+
+        def section_rows():
+            nonlocal header
+            for line in lines:
+                if line.startswith(b'{'):
+                    header = loads(line)
+                    return
+                yield loads(line)
+
+        for line in lines:
+            header = loads(line)
+            break
+        while header is not None:
+            current, header = header, None
+            rows = section_rows()
+            yield current["_table"], current["columns"], rows
+            for _ in rows:
+                pass
+
+    @staticmethod
+    def _read_json_document(first_line: bytes, f) -> Dict:
+        """Parse a single-document JSON backup whose first line was already read"""
+        # Compact documents are one line, so usually nothing is left to read
+        # and the decompressed bytes are parsed without another copy
+        rest = f.read()
+        return _json_loads(first_line + rest if rest else first_line)
+
+    @staticmethod
+    def _iter_json_tables(backup_data: Dict):
+        """Yield (table, columns, rows) from a single-document JSON backup; columns is None if unknown"""
+        # Support tables stored as a dict {name: data} or a list [{name, columns, rows}]
+        tables_raw = backup_data["tables"]
+        if isinstance(tables_raw, list):
+            tables_by_name = {t["name"]: t for t in tables_raw}
+            tables_raw.clear()
+        else:
+            tables_by_name = tables_raw
+
+        # Tables are popped as they are handed out, so each table's parsed
+        # rows can be freed once it has been restored
+        for table_name in list(tables_by_name):
+            table_data = tables_by_name.pop(table_name)
+            # Support table_data as dict {columns, values} (value lists aligned
+            # to columns), the older {columns, rows} (one dict per row), or
+            # directly as a list of rows
+            if isinstance(table_data, dict):
+                rows = table_data["values"] if "values" in table_data else table_data["rows"]
+                yield table_name, table_data["columns"], rows
+            else:
+                # table_data is the rows list; infer columns from first row if dict
+                rows = table_data
+                columns = list(rows[0].keys()) if rows and isinstance(rows[0], dict) else None
+                yield table_name, columns, rows
+
+    def _get_schema_columns(self, cur) -> Dict[str, set]:
+        """Column names of every table in the current schema, keyed by table"""
+        # schema_version changes on every schema change, so the map is reused
+        # across restores until a table is created, dropped or altered
+        cache_key = (self.db_path, cur.execute("PRAGMA schema_version").fetchone()[0])
+        if self._schema_columns_cache and self._schema_columns_cache[0] == cache_key:
+            return self._schema_columns_cache[1]
+
+        # One query instead of a sqlite_master lookup and PRAGMA table_info per table
+        schema_columns: Dict[str, set] = {}
+        for tname, cname in cur.execute(
+                "SELECT m.name, p.name FROM sqlite_master AS m "
+                "JOIN pragma_table_info(m.name) AS p WHERE m.type='table'"):
+            schema_columns.setdefault(tname, set()).add(cname)
+        self._schema_columns_cache = (cache_key, schema_columns)
+        return schema_columns
+
+    def _restore_json_tables(self, tables) -> None:
+        """Replace the contents of each (table, columns, rows) in one transaction"""
+        with self._borrow_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("PRAGMA foreign_keys=OFF")
+
+            # Bulk-load settings for the duration of the restore.
+            # The connection goes back to the pool afterwards, so the
+            # original journal_mode and synchronous are put back.
+            orig_journal_mode = cur.execute("PRAGMA journal_mode").fetchone()[0]
+            orig_synchronous = cur.execute("PRAGMA synchronous").fetchone()[0]
+            self._set_journal_mode(cur, "MEMORY")
+            cur.execute("PRAGMA synchronous=OFF")
+            cur.execute("PRAGMA temp_store=MEMORY")
+            cur.execute("BEGIN IMMEDIATE")
             try:
-                stat = f.stat()
-                mtime = datetime.fromtimestamp(stat.st_mtime)
-                age_days = (datetime.now() - mtime).days
-                backups.append({
-                    "name": f.stem,
-                    "filename": f.name,
-                    "path": str(f),
-                    "size": stat.st_size,
-                    "created": mtime.strftime("%Y-%m-%d %H:%M:%S"),
-                    "size_mb": round(stat.st_size / 1024 / 1024, 2),
-                    "age_days": age_days,
-                })
+                schema_columns = self._get_schema_columns(cur)
+                for table_name, columns, rows in tables:
+                    # Skip tables that don't exist in the current schema
+                    existing_columns = schema_columns.get(table_name)
+                    if existing_columns is None:
+                        print(f"Skipping table {table_name}: not in current schema")
+                        continue
+
+                    cur.execute(f"DELETE FROM {table_name}")
+
+                    if columns is None:
+                        print(f"Skipping table {table_name}: cannot infer columns")
+                        continue
+
+                    # Filter to only columns that exist in the current table
+                    valid_indices = [i for i, c in enumerate(columns) if c in existing_columns]
+                    valid_columns = [columns[i] for i in valid_indices]
+
+                    if not valid_columns:
+                        print(f"Skipping table {table_name}: no matching columns")
+                        continue
+
+                    placeholders = ",".join(["?" for _ in valid_columns])
+                    col_names = ",".join(valid_columns)
+                    sql = f"INSERT OR REPLACE INTO {table_name} ({col_names}) VALUES ({placeholders})"
+
+                    # Per-table invariants are bound once; value lists that carry
+                    # every column in order are converted with a single map()
+                    deserialize = _deserialize_value
+                    all_columns = len(valid_indices) == len(columns)
+                    values_iter = (
+                        [deserialize(row_data.get(col)) for col in valid_columns]
+                        if type(row_data) is dict
+                        else list(map(deserialize, row_data)) if all_columns
+                        else [deserialize(row_data[i]) for i in valid_indices]
+                        for row_data in rows
+                    )
+                    # Full batches go out as one multi-row VALUES statement,
+                    # which runs far fewer VM steps than executemany() per
+                    # row; the short tail falls back to executemany()
+                    rows_per_stmt = max(1, min(_INSERT_BATCH_SIZE, _MAX_SQL_VARIABLES // len(valid_columns)))
+                    multi_sql = (f"INSERT OR REPLACE INTO {table_name} ({col_names}) VALUES "
+                                 + ",".join([f"({placeholders})"] * rows_per_stmt))
+                    execute = cur.execute
+                    flatten = chain.from_iterable
+                    while True:
+                        batch = list(islice(values_iter, rows_per_stmt))
+                        if len(batch) < rows_per_stmt:
+                            if batch:
+                                cur.executemany(sql, batch)
+                            break
+                        execute(multi_sql, list(flatten(batch)))
+
+                conn.commit()
             except Exception:
-                pass
-        backups.sort(key=lambda x: x["created"], reverse=True)
-        return backups
+                conn.rollback()
+                raise
+            finally:
+                # Put the settings back even on failure: leaving WAL for
+                # MEMORY is persistent in the database file
+                cur.execute("PRAGMA foreign_keys=ON")
+                self._set_journal_mode(cur, orig_journal_mode)
+                cur.execute(f"PRAGMA synchronous={orig_synchronous}")
+
+    def list_backups(self) -> List[Dict]:
+        """List all available backups"""
+        # Directory scans are cached until the backup directory's mtime
+        # changes (any file added, removed or renamed in it)
+        try:
+            cache_key = self.backup_dir.stat().st_mtime_ns
+        except OSError:
+            cache_key = None
+        if cache_key is None or cache_key != self._list_cache_key:
+            entries = []
+            # scandir's DirEntry carries the name and (on Windows) the stat
+            # result from the directory read, avoiding a Path per file
+            with os.scandir(self.backup_dir) as it:
+                for de in it:
+                    if not de.name.endswith(BACKUP_FILE_EXTENSION):
+                        continue
+                    try:
+                        stat = de.stat()
+                    except OSError:
+                        continue
+                    entries.append((self._scan_entry(de.name, de.path, stat.st_size, stat.st_mtime),
+                                    stat.st_mtime))
+            # Formatted and sorted once per scan; only the age changes between
+            # calls. Sort on the raw mtime: a float compare, and unlike the
+            # formatted string it orders backups made within the same second
+            entries.sort(key=lambda e: e[1], reverse=True)
+            self._list_cache = entries
+            self._list_cache_key = cache_key
+
+        now = time.time()
+        return [self._with_age(entry, st_mtime, now) for entry, st_mtime in self._list_cache]
+
+    def get_backup_entry(self, backup_path: str) -> Optional[Dict]:
+        """list_backups() entry for a single backup file, or None if it is gone"""
+        try:
+            stat = os.stat(backup_path)
+        except OSError:
+            return None
+        entry = self._scan_entry(os.path.basename(backup_path), backup_path,
+                                 stat.st_size, stat.st_mtime)
+        return self._with_age(entry, stat.st_mtime, time.time())
+
+    @staticmethod
+    def _scan_entry(filename: str, path: str, size: int, st_mtime: float) -> Dict:
+        """The parts of a list_backups() entry that only change with the file"""
+        size_mb = round(size / 1024 / 1024, 2)
+        return {
+            "name": filename[:-len(BACKUP_FILE_EXTENSION)],
+            "filename": filename,
+            "path": path,
+            "size": size,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(st_mtime)),
+            "size_mb": size_mb,
+            "size_mb_str": f"{size_mb:.2f}",
+        }
+
+    @staticmethod
+    def _with_age(entry: Dict, st_mtime: float, now: float) -> Dict:
+        age_days = int((now - st_mtime) // 86400)
+        return {**entry, "age_days": age_days, "age_days_str": str(age_days)}
 
     def delete_backup(self, backup_path: str) -> Tuple[bool, str]:
         """Delete a backup file"""
         try:
             path = Path(backup_path)
-            if path.exists():
-                path.unlink()
-            raw_path = Path(str(path) + ".db")
-            if raw_path.exists():
-                raw_path.unlink()
+            # unlink() straight away rather than exists() first: one syscall
+            # per file, which matters on network-mounted backup directories
+            for target in (str(path), str(path) + _DIGEST_SUFFIX, str(path) + ".db"):
+                try:
+                    os.remove(target)
+                except FileNotFoundError:
+                    pass
+            self._list_cache_key = None
             return True, f"Backup deleted: {path.name}"
         except Exception as e:
             return False, str(e)
 
-    def cleanup_old_backups(self, keep_count: int = 10) -> int:
-        """Keep only the most recent N backups, delete the rest."""
+    def cleanup_old_backups(self, keep_count: int = 10, max_age_days: Optional[int] = None) -> int:
+        """Keep only the most recent N backups, delete the rest.
+
+        If max_age_days is given, backups older than that are deleted as
+        well, in the same pass over the (newest-first) listing.
+        """
+        self._remove_stale_temp_files()
         backups = self.list_backups()
         deleted = 0
-        for backup in backups[keep_count:]:
+        for index, backup in enumerate(backups):
+            if index < keep_count and (max_age_days is None or backup["age_days"] <= max_age_days):
+                continue
             success, _ = self.delete_backup(backup["path"])
             if success:
                 deleted += 1
         return deleted
 
-    def get_backup_log(self) -> List[Dict]:
-        """Return the in-memory backup operation log."""
-        return list(self._backup_log)
+    def _remove_stale_temp_files(self) -> int:
+        """Delete working files left in the backup directory by a backup that died"""
+        cutoff = time.time() - _STALE_TEMP_SECONDS
+        removed = 0
+        try:
+            entries = list(os.scandir(self.backup_dir))
+        except OSError:
+            return 0
+        for entry in entries:
+            name = entry.name
+            # Older versions used mkstemp's default "tmp" prefix
+            legacy = name.startswith("tmp") and name.endswith((".tmp", ".db", ".part", ".tmp" + _DIGEST_SUFFIX))
+            if not (name.startswith(_TEMP_PREFIX) or legacy):
+                continue
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            print(f"Removed {removed} leftover temporary backup file(s)")
+        return removed
+
+    def _log_backup(self, entry: Dict) -> None:
+        """Append one entry to the backup log file"""
+        log_path = self.backup_dir / _BACKUP_LOG_FILE
+        try:
+            with self._lock:
+                with open(log_path, 'ab') as f:
+                    f.write(_json_dumps(entry) + b'\n')
+                    size = f.tell()
+                if size > _BACKUP_LOG_MAX_BYTES:
+                    with open(log_path, 'rb') as f:
+                        tail = deque(f, maxlen=_BACKUP_LOG_MAX_ENTRIES)
+                    tmp_path = str(log_path) + ".tmp"
+                    with open(tmp_path, 'wb') as f:
+                        f.writelines(tail)
+                    os.replace(tmp_path, log_path)
+        except OSError as e:
+            print(f"Could not write backup log: {e}")
+
+    def get_backup_log(self, limit: int = _BACKUP_LOG_MAX_ENTRIES) -> List[Dict]:
+        """Return the newest `limit` backup log entries, oldest first."""
+        log_path = self.backup_dir / _BACKUP_LOG_FILE
+        try:
+            with open(log_path, 'rb') as f:
+                lines = deque(f, maxlen=limit)
+        except OSError:
+            return []
+        entries = []
+        for line in lines:
+            try:
+                entries.append(_json_loads(line))
+            except ValueError:
+                # A line cut short by a crash mid-write
+                continue
+        return entries
+
+    @property
+    def log_by_filename(self) -> Dict[str, Dict]:
+        """Newest backup log entry for each backup file name."""
+        log_path = self.backup_dir / _BACKUP_LOG_FILE
+        try:
+            stat = log_path.stat()
+            cache_key = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return {}
+        if cache_key != self._log_index_key:
+            # Later entries overwrite earlier ones, so the newest wins
+            self._log_index = {entry.get('backup_file'): entry for entry in self.get_backup_log()}
+            self._log_index_key = cache_key
+        return self._log_index
 
     def update_config(self, new_config: Dict) -> None:
         """Update the backup configuration."""
+        if 'compression' in new_config:
+            new_config = dict(new_config, compression=self._resolve_compression(new_config['compression']))
         self.config.update(new_config)
 
+    def validate_backup_file(self, backup_path: str) -> Tuple[bool, str]:
+        """
+        Cheap sanity check of a file picked for restore: extension, size and
+        the first bytes of the compressed and decompressed payload.
+
+        Returns (ok, reason)
+        """
+        if not backup_path.endswith(BACKUP_FILE_EXTENSION):
+            return False, f"Not a {BACKUP_FILE_EXTENSION} file: {os.path.basename(backup_path)}"
+        try:
+            size = os.stat(backup_path).st_size
+            if size < len(_ZSTD_MAGIC):
+                return False, f"Backup file is empty or truncated ({size} bytes)"
+            with open(backup_path, 'rb') as f:
+                magic = f.read(len(_ZSTD_MAGIC))
+            if magic != _ZSTD_MAGIC and not magic.startswith(_GZIP_MAGIC):
+                return False, "File is not a compressed CMMS backup"
+            with self._open_compressed_reader(backup_path) as f:
+                head = f.read(len(_SQLITE_MAGIC))
+        except Exception as e:
+            return False, f"Backup file could not be read: {e}"
+        if head == _SQLITE_MAGIC or head.lstrip().startswith(b"{"):
+            return True, ""
+        return False, "Backup file does not contain a CMMS database snapshot"
+
     def get_backup_info(self, backup_path: str) -> Optional[Dict]:
         """Get metadata from a backup file without restoring it."""
         try:
-            with gzip.open(backup_path, 'rt', encoding='utf-8') as f:
-                data = json.load(f)
+            if self._is_sqlite_backup(backup_path):
+                return self._get_sqlite_backup_info(backup_path)
+
+            with self._open_compressed_reader(backup_path) as f:
+                first_line = f.readline()
+                if first_line.startswith(_NDJSON_HEADER_PREFIX):
+                    return self._get_ndjson_backup_info(first_line, f)
+                data = self._read_json_document(first_line, f)
             info = {
                 "version": data.get("version"),
                 "backup_date": data.get("backup_date"),
@@ -302,3 +934,42 @@ class BackupManager:
         except Exception as e:
             print(f"Could not read backup info: {e}")
             return None
+
+    def _get_ndjson_backup_info(self, first_line: bytes, f) -> Dict:
+        """Metadata and per-table row counts for an NDJSON backup, read line by line"""
+        meta = _json_loads(first_line)
+        info = {
+            "version": meta.get("version"),
+            "backup_date": meta.get("backup_date"),
+            "notes": meta.get("notes"),
+            "tables": {}
+        }
+        counts = info["tables"]
+        table = None
+        for line in f:
+            if line.startswith(b'{'):
+                table = _json_loads(line)["_table"]
+                counts[table] = 0
+            else:
+                counts[table] += 1
+        return info
+
+    def _get_sqlite_backup_info(self, backup_path: str) -> Dict:
+        """Row counts per table for a SQLite-format backup"""
+        tmp_path = self._decompress_to_temp(backup_path)
+        try:
+            conn = sqlite3.connect(tmp_path)
+            try:
+                info = {
+                    "version": None,
+                    "backup_date": datetime.fromtimestamp(os.path.getmtime(backup_path)).isoformat(),
+                    "notes": None,
+                    "tables": {}
+                }
+                for tname in self._get_all_tables(conn):
+                    info["tables"][tname] = conn.execute(f"SELECT COUNT(*) FROM {tname}").fetchone()[0]
+                return info
+            finally:
+                conn.close()
+        finally:
+            os.remove(tmp_path)
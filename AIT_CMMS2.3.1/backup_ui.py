@@ -3,14 +3,80 @@ Database Backup UI Module
 Provides Tkinter interface for managers to backup and manage NEON database backups
 """
 
+import os
+import queue
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, scrolledtext
-import threading
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import time
 from pathlib import Path
 import shutil
 from backup_manager import BackupManager
 
+# Chunk size for exporting backups; copyfileobj's default is far smaller
+_COPY_BUFFER_SIZE = 1 << 20
+_ZERO_COPY_CHUNK = 1 << 30
+
+# One worker runs backups/restores for every BackupUI. A BackupUI is
+# created each time the window is opened, so a per-instance pool would
+# leave a thread behind per window. The thread is started on first use.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="backup")
+
+
+def _zero_copy(fsrc, fdst) -> bool:
+    """
+    Copy between two open files inside the kernel.
+
+    Tries os.copy_file_range (server-side on NFS/SMB, a clone on CoW
+    filesystems), then os.sendfile. Returns False, with both files
+    rewound, when neither is supported for this pair of files.
+    """
+    in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+    if hasattr(os, "copy_file_range"):
+        try:
+            while os.copy_file_range(in_fd, out_fd, _ZERO_COPY_CHUNK):
+                pass
+            return True
+        except OSError:
+            # e.g. EXDEV/ENOSYS/EINVAL on older kernels or across filesystems
+            os.lseek(in_fd, 0, os.SEEK_SET)
+            os.lseek(out_fd, 0, os.SEEK_SET)
+            os.ftruncate(out_fd, 0)
+    if hasattr(os, "sendfile"):
+        try:
+            while os.sendfile(out_fd, in_fd, None, _ZERO_COPY_CHUNK):
+                pass
+            return True
+        except OSError:
+            os.lseek(in_fd, 0, os.SEEK_SET)
+            os.lseek(out_fd, 0, os.SEEK_SET)
+            os.ftruncate(out_fd, 0)
+    return False
+
+
+def _fast_copy(src, dst, bufsize: int = _COPY_BUFFER_SIZE) -> None:
+    """
+    shutil.copy2 replacement for large backup files.
+
+    Uses the kernel's zero-copy paths where available and otherwise
+    copies through a 1 MiB buffer. A zero-copy result whose size does not
+    match the source is redone through the buffer; if that is still short,
+    OSError is raised. File metadata is preserved like copy2.
+    """
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        src_size = os.fstat(fsrc.fileno()).st_size
+        copied = _zero_copy(fsrc, fdst) and os.fstat(fdst.fileno()).st_size == src_size
+        if not copied:
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+            shutil.copyfileobj(fsrc, fdst, bufsize)
+            fdst.flush()
+            if os.fstat(fdst.fileno()).st_size != src_size:
+                raise OSError(f"Incomplete copy of {src}: "
+                              f"{os.fstat(fdst.fileno()).st_size} of {src_size} bytes written")
+    shutil.copystat(src, dst)
+
 
 class BackupUI:
     """Tkinter UI for database backup management"""
@@ -30,8 +96,16 @@ class BackupUI:
         # Let BackupManager auto-detect a safe backup directory
         self.backup_manager = BackupManager(db_config)
         self.backup_window = None
-        self.backup_thread = None
         self.backup_in_progress = False
+        # Backups/restores run on the shared _executor; it never touches Tk
+        # directly, log lines are queued and drained on the Tk thread
+        self._log_queue = queue.SimpleQueue()
+        # Status lines waiting for the next batched write to the text widget
+        self._log_buffer = []
+        self._log_flush_scheduled = False
+        # Timestamp text for the current second, shared by a burst of lines
+        self._log_ts_second = None
+        self._log_ts_text = ""
 
     def open_backup_window(self):
         """Open the database backup management window"""
@@ -45,9 +119,12 @@ class BackupUI:
         self.backup_window.geometry("1000x700")
         self.backup_window.resizable(True, True)
 
-        # Configure style
-        style = ttk.Style()
-        style.theme_use('clam')
+        # The main window normally selects 'clam' at startup already; setting
+        # the theme again restyles every widget in the application, so only
+        # switch when it is not the current theme
+        style = ttk.Style(self.root)
+        if style.theme_use() != 'clam':
+            style.theme_use('clam')
 
         # Create main container
         main_frame = ttk.Frame(self.backup_window)
@@ -160,7 +237,12 @@ class BackupUI:
         self.backup_tree.pack(side='left', fill='both', expand=True)
         scrollbar.pack(side='right', fill='y')
 
-        # Bind right-click context menu
+        # Right-click context menu, built once per window
+        self._context_menu = tk.Menu(self.backup_window, tearoff=0)
+        self._context_menu.add_command(label="Export Backup", command=self.export_backup_handler)
+        self._context_menu.add_command(label="View Details", command=self.view_backup_details)
+        self._context_menu.add_separator()
+        self._context_menu.add_command(label="Delete Backup", command=self.delete_backup_handler)
         self.backup_tree.bind("<Button-3>", self.show_backup_context_menu)
 
         # ===== BACKUP LIST ACTIONS =====
@@ -225,16 +307,47 @@ class BackupUI:
         self.refresh_backup_list()
         self.log_status(f"Backup Manager initialized for user: {self.user_name}")
         self.log_status(f"📁 Backup directory: {self.backup_manager.backup_dir}")
+        self._drain_log_queue()
+
+    def _queue_log(self, message):
+        """Log from the worker thread; the line is shown by _drain_log_queue"""
+        self._log_queue.put(message)
+
+    def _drain_log_queue(self):
+        """Move queued worker log lines into the status box (runs on the Tk thread)"""
+        if self.backup_window is None or not self.backup_window.winfo_exists():
+            return
+        while True:
+            try:
+                message = self._log_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.log_status(message)
+        self.backup_window.after(100, self._drain_log_queue)
 
     def log_status(self, message):
         """Log a message to the status text widget"""
         if self.status_text:
-            self.status_text.config(state='normal')
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self.status_text.insert('end', f"[{timestamp}] {message}\n")
-            self.status_text.see('end')
-            self.status_text.config(state='disabled')
-            self.backup_window.update_idletasks()
+            now = int(time.time())
+            if now != self._log_ts_second:
+                self._log_ts_second = now
+                self._log_ts_text = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))
+            self._log_buffer.append(f"[{self._log_ts_text}] {message}\n")
+            # Lines logged within 80 ms of each other share one widget update
+            if not self._log_flush_scheduled:
+                self._log_flush_scheduled = True
+                self.backup_window.after(80, self._flush_log)
+
+    def _flush_log(self):
+        """Write all buffered status lines in one insert; the event loop repaints"""
+        self._log_flush_scheduled = False
+        lines, self._log_buffer = self._log_buffer, []
+        if not lines or not self.backup_window.winfo_exists():
+            return
+        self.status_text.config(state='normal')
+        self.status_text.insert('end', ''.join(lines))
+        self.status_text.see('end')
+        self.status_text.config(state='disabled')
 
     def create_backup_handler(self):
         """Handle backup creation in a separate thread"""
@@ -247,22 +360,21 @@ class BackupUI:
         self.create_backup_btn.config(state='disabled')
         self.backup_in_progress = True
 
-        # Run backup in separate thread
-        self.backup_thread = threading.Thread(target=self._create_backup_thread, daemon=True)
-        self.backup_thread.start()
+        # Run backup on the worker thread
+        _executor.submit(self._create_backup_thread)
 
     def _create_backup_thread(self):
         """Thread function to create backup"""
         try:
-            self.log_status("Starting database backup...")
-            self.log_status("⏳ This may take several minutes depending on database size...")
+            self._queue_log("Starting database backup...")
+            self._queue_log("⏳ This may take several minutes depending on database size...")
 
             success, backup_path, message = self.backup_manager.create_backup()
 
             if success:
-                self.log_status(f"✅ Backup successful!")
-                self.log_status(f"📁 Location: {backup_path}")
-                self.log_status(f"💾 {message}")
+                self._queue_log(f"✅ Backup successful!")
+                self._queue_log(f"📁 Location: {backup_path}")
+                self._queue_log(f"💾 {message}")
 
                 # Show success dialog
                 self.root.after(0, lambda: messagebox.showinfo(
@@ -272,18 +384,18 @@ class BackupUI:
                     f"{message}\n\n"
                     f"You can now export this file to SharePoint."
                 ))
+
+                # Add just the new row rather than re-listing the directory
+                self.root.after(0, self._show_new_backup, backup_path)
             else:
-                self.log_status(f"❌ Backup failed: {message}")
+                self._queue_log(f"❌ Backup failed: {message}")
                 self.root.after(0, lambda: messagebox.showerror(
                     "Backup Failed",
                     f"Failed to create backup:\n\n{message}"
                 ))
 
-            # Refresh the list
-            self.root.after(0, self.refresh_backup_list)
-
         except Exception as e:
-            self.log_status(f"❌ Error during backup: {str(e)}")
+            self._queue_log(f"❌ Error during backup: {str(e)}")
             self.root.after(0, lambda: messagebox.showerror(
                 "Backup Error",
                 f"Error creating backup:\n\n{str(e)}"
@@ -330,6 +442,14 @@ class BackupUI:
             self.log_status("Restore cancelled - no file selected.")
             return
 
+        # Reject obviously wrong files here rather than partway into the restore
+        valid, reason = self.backup_manager.validate_backup_file(backup_file)
+        if not valid:
+            self.log_status(f"❌ Invalid backup file: {reason}")
+            messagebox.showerror("Invalid Backup File",
+                                 f"{Path(backup_file).name} cannot be restored:\n\n{reason}")
+            return
+
         # Final confirmation with filename
         final_confirm = messagebox.askyesno(
             "Final Confirmation",
@@ -347,33 +467,28 @@ class BackupUI:
         self.restore_backup_btn.config(state='disabled')
         self.backup_in_progress = True
 
-        # Run restore in separate thread
-        self.backup_thread = threading.Thread(
-            target=self._restore_backup_thread,
-            args=(backup_file,),
-            daemon=True
-        )
-        self.backup_thread.start()
+        # Run restore on the worker thread
+        _executor.submit(self._restore_backup_thread, backup_file)
 
     def _restore_backup_thread(self, backup_file):
         """Thread function to restore backup"""
         try:
-            self.log_status("=" * 60)
-            self.log_status("🔄 Starting database restore operation...")
-            self.log_status(f"📁 Source file: {Path(backup_file).name}")
-            self.log_status("=" * 60)
-            self.log_status("⏳ This may take several minutes depending on database size...")
-            self.log_status("⚠️  DO NOT close the application during restore!")
+            self._queue_log("=" * 60)
+            self._queue_log("🔄 Starting database restore operation...")
+            self._queue_log(f"📁 Source file: {Path(backup_file).name}")
+            self._queue_log("=" * 60)
+            self._queue_log("⏳ This may take several minutes depending on database size...")
+            self._queue_log("⚠️  DO NOT close the application during restore!")
 
             # Call the restore method with confirm=True
             success, message = self.backup_manager.restore_backup(backup_file, confirm=True)
 
             if success:
-                self.log_status("=" * 60)
-                self.log_status("✅ Database restored successfully!")
-                self.log_status(f"💾 {message}")
-                self.log_status("=" * 60)
-                self.log_status("⚠️  Please restart the application to ensure all connections are refreshed.")
+                self._queue_log("=" * 60)
+                self._queue_log("✅ Database restored successfully!")
+                self._queue_log(f"💾 {message}")
+                self._queue_log("=" * 60)
+                self._queue_log("⚠️  Please restart the application to ensure all connections are refreshed.")
 
                 # Show success dialog
                 self.root.after(0, lambda: messagebox.showinfo(
@@ -385,9 +500,9 @@ class BackupUI:
                     f"to ensure all connections are properly refreshed."
                 ))
             else:
-                self.log_status("=" * 60)
-                self.log_status(f"❌ Restore failed: {message}")
-                self.log_status("=" * 60)
+                self._queue_log("=" * 60)
+                self._queue_log(f"❌ Restore failed: {message}")
+                self._queue_log("=" * 60)
 
                 self.root.after(0, lambda: messagebox.showerror(
                     "Restore Failed",
@@ -400,9 +515,9 @@ class BackupUI:
             self.root.after(0, self.refresh_backup_list)
 
         except Exception as e:
-            self.log_status("=" * 60)
-            self.log_status(f"❌ Error during restore: {str(e)}")
-            self.log_status("=" * 60)
+            self._queue_log("=" * 60)
+            self._queue_log(f"❌ Error during restore: {str(e)}")
+            self._queue_log("=" * 60)
 
             self.root.after(0, lambda: messagebox.showerror(
                 "Restore Error",
@@ -415,9 +530,8 @@ class BackupUI:
 
     def refresh_backup_list(self):
         """Refresh the list of available backups"""
-        # Clear existing items
-        for item in self.backup_tree.get_children():
-            self.backup_tree.delete(item)
+        # Clear existing items in a single Tcl call
+        self.backup_tree.delete(*self.backup_tree.get_children())
 
         # Get list of backups
         backups = self.backup_manager.list_backups()
@@ -426,18 +540,31 @@ class BackupUI:
             self.log_status("No backups found. Create your first backup by clicking 'Create Backup Now'.")
             return
 
-        # Add backup entries to tree
-        for backup in backups:
-            values = (
-                backup['filename'],
-                f"{backup['size_mb']:.2f}",
-                backup['created'],
-                str(backup['age_days'])
-            )
-            self.backup_tree.insert('', 'end', values=values)
+        # Add backup entries to tree; the filename doubles as the item id so
+        # single rows can be found again without walking the tree
+        rows = [(backup['filename'], self._backup_row(backup)) for backup in backups]
+        insert = self.backup_tree.insert
+        for iid, values in rows:
+            insert('', 'end', iid=iid, values=values)
 
         self.log_status(f"Found {len(backups)} backup(s)")
 
+    @staticmethod
+    def _backup_row(backup):
+        """Treeview values for one list_backups() entry"""
+        return (backup['filename'], backup['size_mb_str'], backup['created'], backup['age_days_str'])
+
+    def _show_new_backup(self, backup_path):
+        """Insert a freshly created backup at the top of the list"""
+        backup = self.backup_manager.get_backup_entry(backup_path)
+        if backup is None:
+            self.refresh_backup_list()
+            return
+        # A backup made within the same second replaces the file of that name
+        if self.backup_tree.exists(backup['filename']):
+            self.backup_tree.delete(backup['filename'])
+        self.backup_tree.insert('', 0, iid=backup['filename'], values=self._backup_row(backup))
+
     def cleanup_backups_handler(self):
         """Handle cleanup of old backups"""
         if messagebox.askyesno(
@@ -486,7 +613,7 @@ class BackupUI:
 
         try:
             self.log_status(f"Exporting backup to: {save_path}")
-            shutil.copy2(source_path, save_path)
+            _fast_copy(source_path, save_path)
             self.log_status(f"✅ Backup exported successfully!")
             self.log_status(f"📁 Saved to: {save_path}")
 
@@ -515,9 +642,12 @@ class BackupUI:
         if messagebox.askyesno("Confirm Delete",
                               f"Are you sure you want to delete:\n\n{filename}?\n\nThis cannot be undone."):
             try:
-                backup_path.unlink()
+                # Goes through BackupManager so the checksum sidecar is removed too
+                success, message = self.backup_manager.delete_backup(str(backup_path))
+                if not success:
+                    raise Exception(message)
                 self.log_status(f"✅ Backup deleted: {filename}")
-                self.refresh_backup_list()
+                self.backup_tree.delete(item)
                 messagebox.showinfo("Deleted", "Backup file deleted successfully.")
             except Exception as e:
                 self.log_status(f"❌ Delete failed: {str(e)}")
@@ -535,36 +665,38 @@ class BackupUI:
         filename, size_mb, created, age = values
 
         # Get backup log info
-        log_entries = self.backup_manager.get_backup_log()
-        backup_log_info = "No log information available"
-
-        for entry in reversed(log_entries):
-            if entry['backup_file'] == filename:
-                backup_log_info = f"""
-Status: {entry['status'].upper()}
-Message: {entry['message']}
-File Size: {entry['file_size']:,} bytes
-Timestamp: {entry['timestamp']}
-"""
-                break
-
-        details = f"""
-BACKUP DETAILS
-{'=' * 60}
-
-Filename:       {filename}
-Size:           {size_mb} MB
-Created:        {created}
-Age:            {age} days
-
-Verification Log:
-{backup_log_info}
-
-EXPORT INSTRUCTIONS:
-1. Click 'Export Selected Backup' to save this file
-2. Upload the exported file to SharePoint
-3. Keep a copy as your disaster recovery backup
-"""
+        entry = self.backup_manager.log_by_filename.get(filename)
+        if entry:
+            backup_log_info = "\n".join((
+                "",
+                f"Status: {entry['status'].upper()}",
+                f"Message: {entry['message']}",
+                f"File Size: {entry['file_size']:,} bytes",
+                f"Timestamp: {entry['timestamp']}",
+                "",
+            ))
+        else:
+            backup_log_info = "No log information available"
+
+        details = "\n".join((
+            "",
+            "BACKUP DETAILS",
+            "=" * 60,
+            "",
+            f"Filename:       {filename}",
+            f"Size:           {size_mb} MB",
+            f"Created:        {created}",
+            f"Age:            {age} days",
+            "",
+            "Verification Log:",
+            backup_log_info,
+            "",
+            "EXPORT INSTRUCTIONS:",
+            "1. Click 'Export Selected Backup' to save this file",
+            "2. Upload the exported file to SharePoint",
+            "3. Keep a copy as your disaster recovery backup",
+            "",
+        ))
 
         messagebox.showinfo("Backup Details", details)
 
@@ -574,16 +706,10 @@ EXPORT INSTRUCTIONS:
         if not item:
             return
 
-        menu = tk.Menu(self.backup_window, tearoff=0)
-        menu.add_command(label="Export Backup", command=self.export_backup_handler)
-        menu.add_command(label="View Details", command=self.view_backup_details)
-        menu.add_separator()
-        menu.add_command(label="Delete Backup", command=self.delete_backup_handler)
-
         try:
-            menu.tk_popup(event.x_root, event.y_root)
+            self._context_menu.tk_popup(event.x_root, event.y_root)
         finally:
-            menu.grab_release()
+            self._context_menu.grab_release()
 
     def save_config(self):
         """Save backup configuration"""
@@ -11,65 +11,93 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 from database_utils import DatabaseConnectionPool
 
-# Database configuration
-DB_CONFIG = {
-    'host': 'ep-tiny-paper-ad8glt26-pooler.c-2.us-east-1.aws.neon.tech',
-    'port': 5432,
-    'database': 'neondb',
-    'user': 'neondb_owner',
-    'password': 'npg_2Nm6hyPVWiIH',
-    'sslmode': 'require'
-}
-
-def cleanup_database():
+# Rows with leading/trailing whitespace in any of the cleaned text fields
+WHITESPACE_PREDICATE = '''
+    bfm_equipment_no != TRIM(bfm_equipment_no) OR
+    sap_material_no != TRIM(sap_material_no) OR
+    description != TRIM(description) OR
+    tool_id_drawing_no != TRIM(tool_id_drawing_no) OR
+    location != TRIM(location) OR
+    master_lin != TRIM(master_lin)
+'''
+
+# Number of affected assets printed before asking for confirmation
+PREVIEW_LIMIT = 20
+
+# Partial index holding only the dirty rows. The predicate is evaluated
+# when a row is written rather than when the table is scanned, and SQLite
+# uses the index for any query whose WHERE clause contains
+# WHITESPACE_PREDICATE, so the scan visits just those rows. (A generated
+# "is dirty" column would need a table rebuild to be STORED; ALTER TABLE
+# can only add VIRTUAL ones, which are recomputed on every read.)
+WHITESPACE_INDEX = f'''
+    CREATE INDEX IF NOT EXISTS idx_equipment_whitespace
+    ON equipment(id)
+    WHERE {WHITESPACE_PREDICATE}
+'''
+
+
+def ensure_index(db_pool):
+    """Idempotently create the whitespace partial index."""
+    with db_pool.get_cursor() as cursor:
+        cursor.execute(WHITESPACE_INDEX)
+
+
+def cleanup_database(create_index=False, verify=False):
     """Remove newlines and extra whitespace from equipment table text fields"""
 
     try:
-        # Initialize connection pool
+        # The SQLite pool needs no connection settings; every phase below
+        # reuses this thread's single connection
         db_pool = DatabaseConnectionPool()
-        db_pool.initialize(DB_CONFIG, min_conn=1, max_conn=2)
+        db_pool.initialize()
 
         print("=" * 100)
         print("DATABASE WHITESPACE CLEANUP TOOL")
         print("=" * 100)
 
+        if create_index:
+            print("\nEnsuring whitespace index exists...")
+            ensure_index(db_pool)
+
         with db_pool.get_cursor(commit=False) as cursor:
             # First, find all records with whitespace issues
             print("\nScanning for assets with whitespace issues...")
 
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT
+                    id,
                     bfm_equipment_no,
                     sap_material_no,
-                    description,
-                    tool_id_drawing_no,
-                    location,
-                    master_lin
+                    description
                 FROM equipment
-                WHERE
-                    bfm_equipment_no != TRIM(bfm_equipment_no) OR
-                    sap_material_no != TRIM(sap_material_no) OR
-                    description != TRIM(description) OR
-                    tool_id_drawing_no != TRIM(tool_id_drawing_no) OR
-                    location != TRIM(location) OR
-                    master_lin != TRIM(master_lin)
+                WHERE {WHITESPACE_PREDICATE}
             ''')
 
-            affected_assets = cursor.fetchall()
+            # Stream the matches: keep every id for the update, but only the
+            # first PREVIEW_LIMIT rows for display
+            affected_ids = []
+            preview = []
+            for asset in cursor:
+                affected_ids.append((asset['id'],))
+                if len(preview) < PREVIEW_LIMIT:
+                    preview.append(asset)
 
-            if not affected_assets:
+            if not affected_ids:
                 print("\n✓ No whitespace issues found! Database is clean.")
                 return
 
-            print(f"\n⚠ Found {len(affected_assets)} asset(s) with whitespace issues:\n")
+            print(f"\n⚠ Found {len(affected_ids)} asset(s) with whitespace issues:\n")
 
             # Show affected assets
-            for i, asset in enumerate(affected_assets, 1):
+            for i, asset in enumerate(preview, 1):
                 bfm = asset['bfm_equipment_no']
                 print(f"{i}. BFM: '{bfm}' (length: {len(bfm) if bfm else 0})")
                 print(f"   SAP: '{asset['sap_material_no']}'")
                 print(f"   Description: '{asset['description']}'")
                 print()
+            if len(affected_ids) > len(preview):
+                print(f"... and {len(affected_ids) - len(preview)} more\n")
 
         # Ask for confirmation
         print("=" * 100)
@@ -83,8 +111,10 @@ def cleanup_database():
         print("\nCleaning database...")
 
         with db_pool.get_cursor(commit=True) as cursor:
-            # Update all text fields to remove leading/trailing whitespace
-            cursor.execute('''
+            # Update all text fields to remove leading/trailing whitespace.
+            # Only the rows found by the scan are rewritten, looked up by
+            # primary key, so the table is not scanned a second time.
+            cursor.executemany('''
                 UPDATE equipment
                 SET
                     bfm_equipment_no = TRIM(bfm_equipment_no),
@@ -93,40 +123,32 @@ def cleanup_database():
                     tool_id_drawing_no = TRIM(tool_id_drawing_no),
                     location = TRIM(location),
                     master_lin = TRIM(master_lin)
-                WHERE
-                    bfm_equipment_no != TRIM(bfm_equipment_no) OR
-                    sap_material_no != TRIM(sap_material_no) OR
-                    description != TRIM(description) OR
-                    tool_id_drawing_no != TRIM(tool_id_drawing_no) OR
-                    location != TRIM(location) OR
-                    master_lin != TRIM(master_lin)
-            ''')
+                WHERE id = ?
+            ''', affected_ids)
 
             rows_affected = cursor.rowcount
             print(f"\n✓ Successfully cleaned {rows_affected} record(s)!")
+            if rows_affected != len(affected_ids):
+                print(f"⚠ Warning: expected {len(affected_ids)} record(s); "
+                      f"some assets were deleted since the scan")
 
-        # Verify cleanup
-        print("\nVerifying cleanup...")
+        # The UPDATE's rowcount is authoritative; a full re-scan is only run on request
+        if verify:
+            print("\nVerifying cleanup...")
 
-        with db_pool.get_cursor(commit=False) as cursor:
-            cursor.execute('''
-                SELECT COUNT(*) as count
-                FROM equipment
-                WHERE
-                    bfm_equipment_no != TRIM(bfm_equipment_no) OR
-                    sap_material_no != TRIM(sap_material_no) OR
-                    description != TRIM(description) OR
-                    tool_id_drawing_no != TRIM(tool_id_drawing_no) OR
-                    location != TRIM(location) OR
-                    master_lin != TRIM(master_lin)
-            ''')
+            with db_pool.get_cursor(commit=False) as cursor:
+                cursor.execute(f'''
+                    SELECT COUNT(*) as count
+                    FROM equipment
+                    WHERE {WHITESPACE_PREDICATE}
+                ''')
 
-            remaining = cursor.fetchone()['count']
+                remaining = cursor.fetchone()['count']
 
-            if remaining == 0:
-                print("✓ Verification successful - all whitespace removed!")
-            else:
-                print(f"⚠ Warning: {remaining} records still have whitespace issues")
+                if remaining == 0:
+                    print("✓ Verification successful - all whitespace removed!")
+                else:
+                    print(f"⚠ Warning: {remaining} records still have whitespace issues")
 
         print("\n" + "=" * 100)
         print("CLEANUP COMPLETE")
@@ -141,5 +163,9 @@ def cleanup_database():
         import traceback
         traceback.print_exc()
 
+    finally:
+        DatabaseConnectionPool().close_all()
+
 if __name__ == "__main__":
-    cleanup_database()
+    cleanup_database(create_index="--ensure-index" in sys.argv[1:],
+                     verify="--verify" in sys.argv[1:])
@@ -53,7 +53,11 @@ class CMPartsIntegration:
         def on_mousewheel(event):
             main_canvas.yview_scroll(int(-1*(event.delta/120)), "units")
 
-        main_canvas.bind_all("<MouseWheel>", on_mousewheel)
+        # Bound on the dialog rather than with bind_all: the Toplevel is in the
+        # bindtags of every widget inside it, so wheel events anywhere in the
+        # dialog scroll it while the rest of the application is unaffected,
+        # and the binding goes away with the dialog
+        dialog.bind("<MouseWheel>", on_mousewheel)
 
         # Header - more compact
         header_frame = ttk.Frame(scrollable_frame)
@@ -132,39 +136,83 @@ class CMPartsIntegration:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load MRO inventory: {str(e)}")
 
+        # Every part is inserted into the tree once; searching only changes
+        # which of these items are attached. search_index holds the
+        # case-folded search keys and tree item id per part, worked out once
+        # here rather than for every row on every search. part_details holds
+        # the (part number, description, quantity) the selection handlers need,
+        # looked up by item id without asking Tk for the row values
+        search_index = []
+        part_details = []
+        for i, part in enumerate(all_parts_data):
+            qty_available = float(part[3]) if part[3] else 0.0
+
+            # Determine tag based on stock level
+            if qty_available <= 0:
+                tag = 'out_of_stock'
+            elif qty_available <= 5:  # Low stock threshold
+                tag = 'low_stock'
+            else:
+                tag = 'in_stock'
+
+            # Ensure part_number is string when inserting into tree
+            iid = parts_tree.insert('', 'end', iid=str(i),
+                                    values=(str(part[0]), part[1], part[2], part[3]), tags=(tag,))
+            search_index.append((str(part[0]).casefold(), str(part[1]).casefold(), iid))
+            part_details.append((str(part[0]).strip(), str(part[1]).strip(), qty_available))
+
+        # Previous search term and the rows it matched
+        last_filter = ['', search_index]
+
         # Function to filter and display parts based on search
         def filter_parts(*args):
             """Filter parts list based on search term"""
-            search_term = search_var.get().lower().strip()
-
-            # Clear current items
-            for item in parts_tree.get_children():
-                parts_tree.delete(item)
-
-            # Filter and display parts
-            for part in all_parts_data:
-                part_number = str(part[0]).lower()
-                description = str(part[1]).lower()
-                qty_available = float(part[3]) if part[3] else 0.0
-
-                # Show part if search term is empty or matches part number or description
-                if not search_term or search_term in part_number or search_term in description:
-                    # Determine tag based on stock level
-                    if qty_available <= 0:
-                        tag = 'out_of_stock'
-                    elif qty_available <= 5:  # Low stock threshold
-                        tag = 'low_stock'
-                    else:
-                        tag = 'in_stock'
-
-                    # Ensure part_number is string when inserting into tree
-                    parts_tree.insert('', 'end', values=(str(part[0]), part[1], part[2], part[3]), tags=(tag,))
-
-        # Initial load of all parts
-        filter_parts()
+            search_term = search_var.get().casefold().strip()
+
+            # A row matching the new term also matched any term contained in
+            # it, so while the user keeps typing only the last matches are
+            # rechecked rather than the whole inventory
+            last_term, last_matches = last_filter
+            candidates = last_matches if last_term and last_term in search_term else search_index
+
+            # Show part if search term is empty or matches part number or description
+            matches = [row for row in candidates
+                       if not search_term or search_term in row[0] or search_term in row[1]]
+            last_filter[:] = [search_term, matches]
+
+            # Attach the matching items in order and detach the rest in a
+            # single Tcl call; no row values are sent to Tk again
+            parts_tree.set_children('', *[row[2] for row in matches])
+
+            # Detached items stay selected in Tk; drop them so "Add" can only
+            # act on a part the user can see
+            selection = parts_tree.selection()
+            if selection:
+                visible = {row[2] for row in matches}
+                hidden = [iid for iid in selection if iid not in visible]
+                if hidden:
+                    parts_tree.selection_remove(*hidden)
+
+        # Debounce the search: each keystroke restarts a short timer, so a
+        # burst of typing refilters the list once instead of per character
+        pending_filter = [None]
+
+        def run_pending_filter():
+            pending_filter[0] = None
+            filter_parts()
+
+        def schedule_filter(*args):
+            if pending_filter[0] is not None:
+                dialog.after_cancel(pending_filter[0])
+            pending_filter[0] = dialog.after(200, run_pending_filter)
+
+        def cancel_pending_filter():
+            if pending_filter[0] is not None:
+                dialog.after_cancel(pending_filter[0])
+                pending_filter[0] = None
 
         # Bind search to filter function
-        search_var.trace('w', filter_parts)
+        search_var.trace('w', schedule_filter)
 
         # Consumption entry frame
         entry_frame = ttk.LabelFrame(scrollable_frame, text="Add Parts Consumed")
@@ -180,8 +228,8 @@ class CMPartsIntegration:
         qty_entry = ttk.Entry(entry_frame, textvariable=qty_var, width=20)
         qty_entry.grid(row=1, column=1, padx=5, pady=5, sticky='w')
 
-        # Track consumed parts
-        consumed_parts = []
+        # Track consumed parts, keyed by part number (kept in the order added)
+        consumed_parts = {}
 
         # Consumed parts list - reduced height for better space usage
         consumed_frame = ttk.LabelFrame(scrollable_frame, text="Parts to be Consumed")
@@ -212,10 +260,10 @@ class CMPartsIntegration:
             """Update selected part label when user selects from available parts"""
             selection = parts_tree.selection()
             if selection:
-                # Use .set() method to get the displayed text from TreeView to preserve leading zeros
-                part_num = str(parts_tree.set(selection[0], 'Part Number')).strip()
-                desc = str(parts_tree.set(selection[0], 'Description')).strip()
+                part_num, desc, _ = part_details[int(selection[0])]
                 selected_part_label.config(text=f"{part_num} - {desc}", foreground='black')
+            else:
+                selected_part_label.config(text="(Select a part from list above)", foreground='gray')
 
         parts_tree.bind('<<TreeviewSelect>>', on_part_select)
 
@@ -235,11 +283,14 @@ class CMPartsIntegration:
                 messagebox.showerror("Error", "Invalid quantity value")
                 return
 
-            # Use .set() method to get the displayed text from TreeView to preserve leading zeros
-            # This avoids issues where TreeView converts "0319" to integer 319
-            part_num = str(parts_tree.set(selection[0], 'Part Number')).strip()
-            desc = str(parts_tree.set(selection[0], 'Description')).strip()
-            qty_available = float(parts_tree.set(selection[0], 'Qty Available'))  # Convert to float for comparison
+            # Taken from the loaded rows rather than read back from the TreeView,
+            # which would turn a part number like "0319" into the integer 319
+            part_num, desc, qty_available = part_details[int(selection[0])]
+
+            # The part number is the consumed list's item id; Tk rejects ""
+            if not part_num:
+                messagebox.showerror("Error", "The selected part has no part number and cannot be consumed.")
+                return
 
             if qty_available <= 0:
                 messagebox.showerror("Part Out of Stock",
@@ -248,28 +299,31 @@ class CMPartsIntegration:
                                     f"Please replenish stock before recording consumption.")
                 return
 
-            if qty_used > qty_available:
+            # Adding a part that is already listed adds to its quantity
+            existing = consumed_parts.get(part_num)
+            total_used = qty_used + (existing['quantity'] if existing else 0)
+
+            if total_used > qty_available:
                 messagebox.showerror("Insufficient Stock",
-                                    f"Quantity used ({qty_used}) exceeds available quantity ({qty_available})\n\n"
+                                    f"Quantity used ({total_used}) exceeds available quantity ({qty_available})\n\n"
                                     f"Part: {part_num}\n"
                                     f"Please adjust the quantity or replenish stock.")
                 return
 
-            # Check if part already added
-            for existing in consumed_parts:
-                if existing['part_number'] == part_num:
-                    messagebox.showwarning("Warning",
-                                          "This part is already in the consumed list. Remove it first if you need to change the quantity.")
-                    return
+            if existing:
+                existing['quantity'] = total_used
+                consumed_tree.item(part_num, values=(part_num, desc, total_used))
+                qty_var.set("1")  # Reset quantity
+                messagebox.showinfo("Success", f"Updated {part_num} to {total_used} in consumed parts list")
+                return
 
             # Add to consumed list
-            consumed_parts.append({
-                'part_number': part_num,
+            consumed_parts[part_num] = {
                 'description': desc,
                 'quantity': qty_used
-            })
+            }
 
-            consumed_tree.insert('', 'end', values=(part_num, desc, qty_used))
+            consumed_tree.insert('', 'end', iid=part_num, values=(part_num, desc, qty_used))
             qty_var.set("1")  # Reset quantity
             messagebox.showinfo("Success", f"Added {part_num} to consumed parts list")
 
@@ -280,11 +334,11 @@ class CMPartsIntegration:
                 messagebox.showwarning("Warning", "Please select a part to remove from the consumed list")
                 return
 
-            # Use .set() method to get the displayed text from TreeView to preserve leading zeros
-            part_num = str(consumed_tree.set(selection[0], 'Part Number')).strip()
+            # Consumed rows use the part number as their item id
+            part_num = selection[0]
 
             # Remove from list
-            consumed_parts[:] = [p for p in consumed_parts if p['part_number'] != part_num]
+            consumed_parts.pop(part_num, None)
             consumed_tree.delete(selection[0])
 
         # Buttons frame
@@ -303,7 +357,7 @@ class CMPartsIntegration:
                                               "No parts were added to the consumed list. Continue without recording parts?")
                 if not response:
                     return
-                main_canvas.unbind_all("<MouseWheel>")
+                cancel_pending_filter()
                 dialog.destroy()
                 if callback:
                     callback(True)
@@ -311,59 +365,61 @@ class CMPartsIntegration:
 
             try:
                 cursor = self.conn.cursor()
-
-                # Record each consumed part
-                for part in consumed_parts:
-                    # Get unit price for cost calculation
-                    cursor.execute('''
-                        SELECT unit_price FROM mro_inventory WHERE part_number = ?
-                    ''', (str(part['part_number']),))
-                    result = cursor.fetchone()
-                    unit_price = float(result[0]) if result and result[0] else 0.0
-                    total_cost = unit_price * part['quantity']
-
-                    # Create transaction record
-                    cursor.execute('''
-                        INSERT INTO mro_stock_transactions
-                        (part_number, transaction_type, quantity, technician_name, notes, transaction_date)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
-                        str(part['part_number']),
+                now = datetime.now()
+                transactions = []
+                parts_used = []
+                stock_updates = []
+                for part_number, part in consumed_parts.items():
+                    transactions.append((
+                        part_number,
                         'Issue',
                         -part['quantity'],  # Negative for consumption
                         technician_name,
                         f"CM Work Order: {cm_number}",
-                        datetime.now()
+                        now
                     ))
-
-                    # Record in cm_parts_used table for tracking and reporting
-                    cursor.execute('''
-                        INSERT INTO cm_parts_used
-                        (cm_number, part_number, quantity_used, total_cost, recorded_date, recorded_by, notes)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (
+                    parts_used.append((
                         cm_number,
-                        str(part['part_number']),
+                        part_number,
+                        part['quantity'],
                         part['quantity'],
-                        total_cost,
-                        datetime.now(),
+                        part_number,
+                        now,
                         technician_name,
                         f"Parts consumed during CM {cm_number}"
                     ))
-
-                    # Update inventory quantity
-                    cursor.execute('''
-                        UPDATE mro_inventory
-                        SET quantity_in_stock = quantity_in_stock - ?,
-                            last_updated = ?
-                        WHERE part_number = ?
-                    ''', (part['quantity'], datetime.now(), str(part['part_number'])))
+                    stock_updates.append((part['quantity'], now, part_number))
+
+                # Create transaction records
+                cursor.executemany('''
+                    INSERT INTO mro_stock_transactions
+                    (part_number, transaction_type, quantity, technician_name, notes, transaction_date)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', transactions)
+
+                # Record in cm_parts_used table for tracking and reporting;
+                # the cost is worked out from the part's unit price in SQL
+                cursor.executemany('''
+                    INSERT INTO cm_parts_used
+                    (cm_number, part_number, quantity_used, total_cost, recorded_date, recorded_by, notes)
+                    VALUES (?, ?, ?,
+                            ? * COALESCE((SELECT unit_price FROM mro_inventory WHERE part_number = ?), 0),
+                            ?, ?, ?)
+                ''', parts_used)
+
+                # Update inventory quantities
+                cursor.executemany('''
+                    UPDATE mro_inventory
+                    SET quantity_in_stock = quantity_in_stock - ?,
+                        last_updated = ?
+                    WHERE part_number = ?
+                ''', stock_updates)
 
                 self.conn.commit()
 
                 messagebox.showinfo("Success",
                                    f"Successfully recorded {len(consumed_parts)} part(s) consumed for CM {cm_number}")
-                main_canvas.unbind_all("<MouseWheel>")
+                cancel_pending_filter()
                 dialog.destroy()
 
                 if callback:
@@ -383,7 +439,7 @@ class CMPartsIntegration:
                 if not response:
                     return
 
-            main_canvas.unbind_all("<MouseWheel>")
+            cancel_pending_filter()
             dialog.destroy()
             if callback:
                 callback(False)
@@ -401,9 +457,8 @@ class CMPartsIntegration:
         main_canvas.pack(side="left", fill="both", expand=True)
         main_scrollbar.pack(side="right", fill="y")
 
-        # Cleanup mousewheel binding when dialog closes
         def on_closing():
-            main_canvas.unbind_all("<MouseWheel>")
+            cancel_pending_filter()
             dialog.destroy()
             if callback:
                 callback(False)
@@ -434,16 +489,19 @@ class CMPartsIntegration:
         # Get parts data from database
         try:
             cursor = self.conn.cursor()
+            # Rows come back already formatted for display, with the grand
+            # total on every row. Cost is always calculated from the current
+            # unit_price, not the cached total_cost
             cursor.execute('''
                 SELECT
                     cp.part_number,
-                    mi.name,
-                    cp.quantity_used,
-                    mi.unit_price,
-                    mi.unit_of_measure,
-                    cp.recorded_date,
-                    cp.recorded_by,
-                    cp.notes
+                    COALESCE(NULLIF(mi.name, ''), 'N/A') AS description,
+                    printf('%.2f %s', COALESCE(cp.quantity_used, 0),
+                           COALESCE(NULLIF(mi.unit_of_measure, ''), 'EA')) AS qty_display,
+                    printf('$%.2f', COALESCE(cp.quantity_used, 0) * COALESCE(mi.unit_price, 0)) AS cost,
+                    COALESCE(NULLIF(substr(cp.recorded_date, 1, 19), ''), 'N/A') AS date_recorded,
+                    COALESCE(NULLIF(cp.recorded_by, ''), 'N/A') AS recorded_by,
+                    SUM(COALESCE(cp.quantity_used, 0) * COALESCE(mi.unit_price, 0)) OVER () AS grand_total
                 FROM cm_parts_used cp
                 LEFT JOIN mro_inventory mi ON cp.part_number = mi.part_number
                 WHERE cp.cm_number = ?
@@ -495,30 +553,9 @@ class CMPartsIntegration:
         parts_tree.column('Recorded By', width=100)
 
         # Populate with data
-        total_cost = 0.0
+        total_cost = parts_data[0][6] if parts_data else 0.0
         for part in parts_data:
-            part_number = part[0]
-            description = part[1] if part[1] else "N/A"
-            qty_used = part[2] if part[2] else 0.0
-            unit_price = part[3] if part[3] else 0.0
-            unit_of_measure = part[4] if part[4] else "EA"
-            date_recorded = str(part[5])[:19] if part[5] else "N/A"
-            recorded_by = part[6] if part[6] else "N/A"
-
-            # Always calculate cost from current unit_price, not cached total_cost
-            cost = qty_used * unit_price
-            total_cost += cost
-
-            qty_display = f"{qty_used:.2f} {unit_of_measure}"
-
-            parts_tree.insert('', 'end', values=(
-                part_number,
-                description,
-                qty_display,
-                f"${cost:.2f}",
-                date_recorded,
-                recorded_by
-            ))
+            parts_tree.insert('', 'end', values=tuple(part)[:6])
 
         parts_tree.pack(fill='both', expand=True, padx=5, pady=5)
 
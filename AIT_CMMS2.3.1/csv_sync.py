@@ -21,8 +21,11 @@ CSV columns  (same header format as the originals):
 
 import os
 import csv
+import time
+import atexit
 import threading
-from typing import Optional, List, Dict
+from functools import lru_cache
+from typing import Optional, List, Dict, Set, Tuple, Iterator
 
 # ---------------------------------------------------------------------------
 # Constants
@@ -47,56 +50,218 @@ CSV_COLUMNS = [
     "Time of Completion",
 ]
 
-_csv_lock = threading.Lock()  # Protect concurrent CSV writes
+# Rows are kept as tuples in CSV_COLUMNS order rather than dicts
+_IDX_BFM = CSV_COLUMNS.index("BFM")
+
+_csv_lock = threading.Lock()  # Protect the cache below
+
+# One lock per priority file, held while that file is written to disk.  It is
+# always taken before _csv_lock, never while holding it, so a rewrite does not
+# hold up cache lookups/updates or writes to the other files.  A file's rows
+# are taken from the cache while holding its lock, so writes land in order.
+_file_locks: Dict[int, threading.Lock] = {p: threading.Lock() for p in CSV_FILES}
+# Files being rewritten.  Their stat no longer matches _cache_stat, and that
+# must not be taken for an outside edit.
+_writing: Set[int] = set()
+
+# In-memory copy of the CSV files: {priority: {bfm_str: row}}.  Each file
+# is parsed once and only re-read when its mtime/size changes on disk (e.g.
+# after it was edited in Excel); updates go through the cache and rewrite only
+# the files whose contents actually changed.
+_cache: Dict[int, Dict[str, Tuple]] = {}
+_cache_stat: Dict[int, Optional[Tuple[int, int]]] = {}
+
+# Changed priorities are written out together once no update has arrived for
+# _FLUSH_DELAY seconds, so a bulk import rewrites each file once rather than
+# once per asset.  A single background thread waits for _flush_deadline;
+# anything still pending at exit is written by an atexit handler.
+_FLUSH_DELAY = 0.25
+# A write that failed (e.g. the file is open in Excel on Windows) stays
+# pending and is retried after this many seconds.
+_RETRY_DELAY = 5.0
+_dirty: Set[int] = set()
+_flush_deadline: Optional[float] = None        # time.monotonic() value
+_flush_wakeup = threading.Condition(_csv_lock)
+_flush_thread: Optional[threading.Thread] = None
 
 
 # ---------------------------------------------------------------------------
 # Internal helpers
 # ---------------------------------------------------------------------------
 
-def _read_csv(filepath: str) -> List[Dict]:
-    """Read a priority CSV file and return a list of row dicts."""
+def _read_csv(filepath: str) -> Iterator[Tuple]:
+    """
+    Yield the rows of a priority CSV file as tuples in CSV_COLUMNS order.
+
+    Rows are streamed straight into the caller's cache rather than collected
+    into a list first, so a large file is not held in memory twice.
+    """
     if not os.path.exists(filepath):
-        return []
+        return
 
-    rows = []
+    width = len(CSV_COLUMNS)
     try:
         with open(filepath, newline="", encoding="utf-8-sig") as fh:
-            reader = csv.DictReader(fh)
-            for row in reader:
-                rows.append(dict(row))
+            reader = csv.reader(fh)
+            header = next(reader, None)
+            if header is None:
+                return
+            if header == CSV_COLUMNS:
+                for row in reader:
+                    if not row:
+                        continue
+                    if len(row) != width:
+                        row = (row + [""] * width)[:width]
+                    yield tuple(row)
+            else:
+                # Columns saved in another order (e.g. rearranged in Excel)
+                positions = [header.index(col) if col in header else None for col in CSV_COLUMNS]
+                for row in reader:
+                    if not row:
+                        continue
+                    yield tuple(row[i] if i is not None and i < len(row) else ""
+                                for i in positions)
     except Exception as e:
         print(f"Warning: could not read {filepath}: {e}")
 
-    return rows
 
+def _write_csv(filepath: str, rows: List[Tuple]) -> bool:
+    """
+    Write rows to a priority CSV file (creates the file if missing).
+    Returns False if the file could not be written.
 
-def _write_csv(filepath: str, rows: List[Dict]) -> None:
-    """Write rows to a priority CSV file (creates the file if missing)."""
+    The rows go to a temporary file that then replaces the original, so a
+    crash mid-write or a reader opening the file never sees it half written.
+    The temporary file is synced to disk first so a power loss cannot leave
+    an empty file in place of the old one.
+    """
+    tmp_path = filepath + ".tmp"
     try:
-        with open(filepath, "w", newline="", encoding="utf-8-sig") as fh:
-            writer = csv.DictWriter(fh, fieldnames=CSV_COLUMNS, extrasaction="ignore")
-            writer.writeheader()
+        with open(tmp_path, "w", newline="", encoding="utf-8-sig") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(CSV_COLUMNS)
             writer.writerows(rows)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, filepath)
     except Exception as e:
         print(f"Warning: could not write {filepath}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+    return True
 
 
-def _bfm_key(row: Dict) -> str:
+def _csv_row(*values) -> Tuple[str, ...]:
+    """Build a row in the form it reads back from the file: all strings, None as ""."""
+    return tuple("" if v is None else str(v) for v in values)
+
+
+def _bfm_key(row: Tuple) -> str:
     """Return a normalised BFM string for comparison."""
-    bfm = row.get("BFM", "")
-    try:
-        return str(int(float(str(bfm).strip())))
-    except (ValueError, TypeError):
-        return str(bfm).strip()
+    return _normalise_bfm(row[_IDX_BFM])
 
 
 def _normalise_bfm(bfm) -> str:
     """Normalise a BFM value to a canonical string."""
+    return _normalise_bfm_str(str(bfm).strip())
+
+
+@lru_cache(maxsize=4096)
+def _normalise_bfm_str(bfm: str) -> str:
+    """Normalise a stripped BFM string; cached as the same BFMs recur on every reload."""
     try:
-        return str(int(float(str(bfm).strip())))
-    except (ValueError, TypeError):
-        return str(bfm).strip()
+        return str(int(float(bfm)))
+    except (ValueError, OverflowError):
+        return bfm
+
+
+def _file_stat(filepath: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _ensure_loaded() -> None:
+    """(Re)load any priority CSV changed since it was cached.  Caller holds _csv_lock."""
+    for p_level, filepath in CSV_FILES.items():
+        stat = _file_stat(filepath)
+        if p_level in _cache and (
+            stat == _cache_stat.get(p_level) or p_level in _dirty or p_level in _writing
+        ):
+            continue
+        _cache[p_level] = {_bfm_key(row): row for row in _read_csv(filepath)}
+        _cache_stat[p_level] = stat
+
+
+def _sorted_rows(p_level: int) -> List[Tuple]:
+    """Rows of one cached priority list, sorted by BFM.  Caller holds _csv_lock."""
+    rows = _cache[p_level]
+    # The keys are already normalised BFMs in file order with any new ones
+    # appended, so sorting them is close to a single linear pass.
+    return [rows[bfm] for bfm in sorted(rows)]
+
+
+def _write_priority(p_level: int) -> None:
+    """
+    Write one priority file if it has pending changes.  Caller must not hold
+    _csv_lock; it is only held briefly to take the rows and record the result.
+    """
+    with _file_locks[p_level]:
+        with _csv_lock:
+            if p_level not in _dirty:
+                return  # Already written by another flush
+            _dirty.discard(p_level)
+            rows = _sorted_rows(p_level)
+            _writing.add(p_level)
+
+        ok = False
+        try:
+            ok = _write_csv(CSV_FILES[p_level], rows)
+        finally:
+            with _csv_lock:
+                _writing.discard(p_level)
+                if ok:
+                    _cache_stat[p_level] = _file_stat(CSV_FILES[p_level])
+                else:
+                    # Keep the change pending so the cache and file catch up
+                    # later; the file no longer matches the cache meanwhile.
+                    _cache_stat.pop(p_level, None)
+                    _dirty.add(p_level)
+                    _schedule_flush(_RETRY_DELAY)
+
+
+def _schedule_flush(delay: float = _FLUSH_DELAY) -> None:
+    """(Re)start the delayed write of the dirty priorities.  Caller holds _csv_lock."""
+    global _flush_deadline, _flush_thread
+    previous = _flush_deadline
+    _flush_deadline = time.monotonic() + delay
+    if _flush_thread is None:
+        _flush_thread = threading.Thread(target=_flush_worker, name="csv-sync-flush", daemon=True)
+        _flush_thread.start()
+    elif previous is None or _flush_deadline < previous:
+        # Only wake the thread when it has to write sooner than planned
+        _flush_wakeup.notify()
+
+
+def _flush_worker() -> None:
+    """Background thread: write the dirty priorities once their deadline passes."""
+    while True:
+        with _csv_lock:
+            while True:
+                if _flush_deadline is None:
+                    _flush_wakeup.wait()
+                    continue
+                remaining = _flush_deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                _flush_wakeup.wait(remaining)
+        flush_csvs()
 
 
 # ---------------------------------------------------------------------------
@@ -134,40 +299,64 @@ def sync_asset_to_csv(
         return
 
     with _csv_lock:
-        # Remove this BFM from every CSV first (handles priority changes cleanly)
-        for p_level, filepath in CSV_FILES.items():
-            rows = _read_csv(filepath)
-            new_rows = [r for r in rows if _bfm_key(r) != bfm_str]
-            if len(new_rows) != len(rows):  # Something was removed
-                _write_csv(filepath, new_rows)
+        _ensure_loaded()
+
+        # Remove this BFM from every other CSV (handles priority changes cleanly)
+        changed = False
+        for p_level in CSV_FILES:
+            if p_level != priority and _cache[p_level].pop(bfm_str, None) is not None:
+                _dirty.add(p_level)
+                changed = True
 
         # If a valid priority was given, add to the correct CSV
         if priority in (1, 2, 3):
-            filepath = CSV_FILES[priority]
-            rows = _read_csv(filepath)
-
-            new_row = {
-                "SAP": sap_no,
-                "BFM": bfm_str,
-                "DESCRIPTION": description,
-                "TOOL ID": tool_id,
-                "LOCATION": location,
-                "PRIORITY": priority,
-                "PM QTY": pm_qty,
-                "REVIEWED": reviewed,
-                "Time of Completion": time_of_completion,
-            }
-
-            # Append and sort by BFM
-            rows.append(new_row)
-            rows.sort(key=_bfm_key)
-            _write_csv(filepath, rows)
-
-            print(
-                f"CSV sync: BFM {bfm_str} written to PM_LIST_A220_{priority}.csv"
+            # In CSV_COLUMNS order
+            new_row = _csv_row(
+                sap_no,
+                bfm_str,
+                description,
+                tool_id,
+                location,
+                priority,
+                pm_qty,
+                reviewed,
+                time_of_completion,
             )
-        else:
-            print(f"CSV sync: BFM {bfm_str} removed from all priority CSVs")
+
+            # Re-saving an asset with unchanged details leaves the file alone
+            if _cache[priority].get(bfm_str) != new_row:
+                _cache[priority][bfm_str] = new_row
+                _dirty.add(priority)
+                changed = True
+
+        # Only the files that changed are rewritten, shortly after the last update
+        if not changed:
+            return
+        _schedule_flush()
+
+    if priority in (1, 2, 3):
+        print(f"CSV sync: BFM {bfm_str} queued for PM_LIST_A220_{priority}.csv")
+    else:
+        print(f"CSV sync: BFM {bfm_str} queued for removal from all priority CSVs")
+
+
+def flush_csvs() -> None:
+    """
+    Write any pending CSV changes to disk now.
+
+    Call at the end of a bulk import or before reading the CSV files directly;
+    otherwise changes are written automatically a moment after the last update.
+    """
+    global _flush_deadline
+    with _csv_lock:
+        _flush_deadline = None
+        pending = sorted(_dirty)
+    for p_level in pending:
+        _write_priority(p_level)
+
+
+# The flush thread is a daemon, so write anything still pending on exit
+atexit.register(flush_csvs)
 
 
 def remove_asset_from_csv(bfm_no) -> None:
@@ -188,10 +377,10 @@ def get_priority_from_csv(bfm_no) -> Optional[int]:
     Returns 1, 2, 3 or None if the asset is not listed in any CSV.
     """
     bfm_str = _normalise_bfm(bfm_no)
-    for p_level, filepath in CSV_FILES.items():
-        rows = _read_csv(filepath)
-        for row in rows:
-            if _bfm_key(row) == bfm_str:
+    with _csv_lock:
+        _ensure_loaded()
+        for p_level in CSV_FILES:
+            if bfm_str in _cache[p_level]:
                 return p_level
     return None
 
@@ -201,14 +390,9 @@ def load_priority_map() -> Dict[str, int]:
     Build and return a complete {bfm_str: priority} mapping from all CSV files.
     Useful for bulk priority lookups (e.g. PM scheduling).
     """
-    priority_map: Dict[str, int] = {}
-    for p_level, filepath in CSV_FILES.items():
-        rows = _read_csv(filepath)
-        for row in rows:
-            bfm = _bfm_key(row)
-            if bfm:
-                priority_map[bfm] = p_level
-    return priority_map
+    with _csv_lock:
+        _ensure_loaded()
+        return {bfm: p_level for p_level in CSV_FILES for bfm in _cache[p_level] if bfm}
 
 
 def rebuild_csvs_from_db(conn) -> None:
@@ -222,7 +406,9 @@ def rebuild_csvs_from_db(conn) -> None:
     ----------
     conn : SQLite connection
     """
+    buckets: Dict[int, List[Tuple]] = {1: [], 2: [], 3: []}
     cursor = conn.cursor()
+    cursor.arraysize = 1000
     try:
         cursor.execute(
             """
@@ -233,38 +419,35 @@ def rebuild_csvs_from_db(conn) -> None:
             ORDER BY priority, bfm_equipment_no
             """
         )
-        rows = cursor.fetchall()
+        # Bucket rows by priority, a batch at a time.  Columns are unpacked
+        # by position, which works for both plain tuples and pool rows.
+        while True:
+            batch = cursor.fetchmany()
+            if not batch:
+                break
+            for bfm_raw, description, location, sap_no, tool_id, priority, pm_qty, last_pm in batch:
+                bfm = _normalise_bfm(bfm_raw)
+                if priority in (1, 2, 3) and bfm:
+                    buckets[priority].append(
+                        _csv_row(sap_no, bfm, description, tool_id, location,
+                                 priority, pm_qty, "YES", last_pm)
+                    )
     except Exception as e:
         print(f"rebuild_csvs_from_db: query failed: {e}")
         return
     finally:
         cursor.close()
 
-    # Bucket rows by priority
-    buckets: Dict[int, List[Dict]] = {1: [], 2: [], 3: []}
-    for row in rows:
-        if isinstance(row, dict):
-            bfm = _normalise_bfm(row.get("bfm_equipment_no", ""))
-            priority = row.get("priority")
-            if priority in (1, 2, 3) and bfm:
-                buckets[priority].append(
-                    {
-                        "SAP": row.get("sap_no", ""),
-                        "BFM": bfm,
-                        "DESCRIPTION": row.get("description", ""),
-                        "TOOL ID": row.get("tool_id", ""),
-                        "LOCATION": row.get("location", ""),
-                        "PRIORITY": priority,
-                        "PM QTY": row.get("pm_qty", ""),
-                        "REVIEWED": "YES",
-                        "Time of Completion": row.get("last_monthly_pm", ""),
-                    }
-                )
-
     with _csv_lock:
+        # Written straight away; this replaces any pending changes
         for p_level, csv_rows in buckets.items():
-            _write_csv(CSV_FILES[p_level], csv_rows)
-            print(
-                f"CSV rebuild: {len(csv_rows)} assets written to "
-                f"PM_LIST_A220_{p_level}.csv"
-            )
+            _cache[p_level] = {row[_IDX_BFM]: row for row in csv_rows}
+            _dirty.add(p_level)
+    for p_level in buckets:
+        _write_priority(p_level)
+
+    for p_level, csv_rows in buckets.items():
+        print(
+            f"CSV rebuild: {len(csv_rows)} assets written to "
+            f"PM_LIST_A220_{p_level}.csv"
+        )
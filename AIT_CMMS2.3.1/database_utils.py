@@ -12,6 +12,7 @@ import sqlite3
 import os
 import threading
 import hashlib
+import hmac
 import time
 from contextlib import contextmanager
 from datetime import datetime
@@ -75,9 +76,22 @@ class _Row(dict):
         return super().get(key, default)
 
 
+# (description, keys) of the last result set seen.  cursor.description is
+# the same object for every row of a result set, so the column names are
+# only extracted once per query instead of once per row.
+_last_keys = (None, ())
+
+
 def _dict_factory(cursor, row):
     """Return a _Row so callers can use row[0] or row['name'] interchangeably."""
-    keys = [col[0] for col in cursor.description]
+    global _last_keys
+    description = cursor.description
+    cached = _last_keys
+    if cached[0] is description:
+        keys = cached[1]
+    else:
+        keys = tuple(col[0] for col in description)
+        _last_keys = (description, keys)
     return _Row(keys, row)
 
 
@@ -110,6 +124,7 @@ class DatabaseConnectionPool:
             self._db_path = _DB_FILE
             self._local = threading.local()   # thread-local connections
             self._write_lock = threading.Lock()
+            self._wal_set = False   # journal_mode is stored in the database file
 
     # ------------------------------------------------------------------
     # Public initialisation (called from AITCMMSSystem.__init__)
@@ -125,9 +140,6 @@ class DatabaseConnectionPool:
             self._initialized = True
             # Touch the database to create it and enable WAL mode
             conn = self._make_connection()
-            conn.execute("PRAGMA journal_mode=WAL")
-            conn.execute("PRAGMA synchronous=NORMAL")
-            conn.execute("PRAGMA foreign_keys=ON")
             conn.close()
             print(f"SQLite database initialised: {self._db_path}")
 
@@ -141,11 +153,20 @@ class DatabaseConnectionPool:
             check_same_thread=False,
             timeout=30,
             detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+            # The application issues a few hundred distinct statements; keep
+            # more of them compiled than sqlite3's default of 128.
+            cached_statements=512,
         )
         conn.row_factory = _dict_factory
-        conn.execute("PRAGMA foreign_keys=ON")
-        conn.execute("PRAGMA journal_mode=WAL")
-        conn.execute("PRAGMA synchronous=NORMAL")
+        # foreign_keys and synchronous are per connection; WAL only needs
+        # switching on once as it persists in the database file.
+        if self._wal_set:
+            conn.executescript("PRAGMA foreign_keys=ON; PRAGMA synchronous=NORMAL;")
+        else:
+            conn.executescript(
+                "PRAGMA journal_mode=WAL; PRAGMA foreign_keys=ON; PRAGMA synchronous=NORMAL;"
+            )
+            self._wal_set = True
         return conn
 
     def _get_thread_connection(self):
@@ -155,14 +176,12 @@ class DatabaseConnectionPool:
             conn = self._make_connection()
             self._local.conn = conn
         else:
-            # Verify the connection is still alive
+            # A thread-local SQLite connection only goes bad if something
+            # closed it; reading total_changes detects that without running
+            # a query on every call.
             try:
-                conn.execute("SELECT 1")
-            except Exception:
-                try:
-                    conn.close()
-                except Exception:
-                    pass
+                conn.total_changes
+            except sqlite3.ProgrammingError:
                 conn = self._make_connection()
                 self._local.conn = conn
         return conn
@@ -272,6 +291,43 @@ class OptimisticConcurrencyControl:
             (record_id,),
         )
 
+    @staticmethod
+    def conditional_update(cursor, table, record_id, expected_version, id_column="id",
+                           changes=None, updated_date_column="updated_date"):
+        """
+        Apply changes, check and increment the version in one statement.
+
+        changes is an optional {column: value} dict written in the same
+        UPDATE.  Pass updated_date_column=None for tables without one.
+
+        Returns the same (success, version, message) tuple as check_version,
+        where version is the new version on success.  The record is only
+        re-read when the update fails, to report why.
+        """
+        changes = changes or {}
+        assignments = [f"{column} = ?" for column in changes]
+        assignments.append("version = version + 1")
+        if updated_date_column:
+            assignments.append(f"{updated_date_column} = CURRENT_TIMESTAMP")
+
+        cursor.execute(
+            f"UPDATE {table} SET {', '.join(assignments)} WHERE {id_column} = ? AND version = ?",
+            (*changes.values(), record_id, expected_version),
+        )
+        if cursor.rowcount > 0:
+            return True, expected_version + 1, "Version check passed"
+
+        ok, current_version, message = OptimisticConcurrencyControl.check_version(
+            cursor, table, record_id, expected_version, id_column
+        )
+        if ok:
+            # Another writer moved the version between the UPDATE and the re-read
+            message = (
+                "Conflict detected: Record was modified by another user. "
+                "Please reload it and try again."
+            )
+        return False, current_version, message
+
 
 # ---------------------------------------------------------------------------
 # AuditLogger  (adapted for SQLite – uses ? placeholders)
@@ -314,13 +370,39 @@ class AuditLogger:
 class UserManager:
     """Manages user authentication and sessions."""
 
+    PBKDF2_ITERATIONS = 120_000
+
     @staticmethod
-    def hash_password(password):
-        return hashlib.sha256(password.encode()).hexdigest()
+    def hash_password(password, salt=None):
+        """
+        Return a salted PBKDF2-SHA256 hash stored as 'salt_hex:key_hex'.
+        A new random salt is generated unless one is given.
+        """
+        if salt is None:
+            salt = os.urandom(16)
+        key = hashlib.pbkdf2_hmac(
+            "sha256", password.encode(), salt, UserManager.PBKDF2_ITERATIONS
+        )
+        return salt.hex() + ":" + key.hex()
+
+    @staticmethod
+    def is_legacy_hash(hashed_password):
+        """True for an unsalted SHA-256 hash from before PBKDF2 was used."""
+        return ":" not in (hashed_password or "")
 
     @staticmethod
     def verify_password(password, hashed_password):
-        return UserManager.hash_password(password) == hashed_password
+        if not hashed_password:
+            return False
+        if UserManager.is_legacy_hash(hashed_password):
+            candidate = hashlib.sha256(password.encode()).hexdigest()
+        else:
+            try:
+                salt = bytes.fromhex(hashed_password.split(":", 1)[0])
+            except ValueError:
+                return False
+            candidate = UserManager.hash_password(password, salt)
+        return hmac.compare_digest(candidate.encode(), hashed_password.encode())
 
     @staticmethod
     def authenticate(cursor, username, password):
@@ -337,26 +419,29 @@ class UserManager:
         if not user:
             return None
 
-        if isinstance(user, (tuple, list)):
-            user = {
-                "id": user[0],
-                "username": user[1],
-                "full_name": user[2],
-                "role": user[3],
-                "password_hash": user[4],
-                "is_active": user[5],
-            }
-        elif not isinstance(user, dict):
-            user = dict(user)
-
-        if not user["is_active"]:
+        # Positional unpacking works for plain tuples and dict-style rows alike
+        user_id, user_name, full_name, role, password_hash, is_active = user
+
+        if not is_active:
             return None
 
-        if not UserManager.verify_password(password, user["password_hash"]):
+        if not UserManager.verify_password(password, password_hash):
             return None
 
-        del user["password_hash"]
-        return user
+        # Upgrade old unsalted hashes now that we have the plain password
+        if UserManager.is_legacy_hash(password_hash):
+            cursor.execute(
+                "UPDATE users SET password_hash = ? WHERE id = ?",
+                (UserManager.hash_password(password), user_id),
+            )
+
+        return {
+            "id": user_id,
+            "username": user_name,
+            "full_name": full_name,
+            "role": role,
+            "is_active": is_active,
+        }
 
     @staticmethod
     def change_password(cursor, username, current_password, new_password):
@@ -373,15 +458,12 @@ class UserManager:
         if not user:
             return False, "User not found"
 
-        if isinstance(user, (tuple, list)):
-            user = {"id": user[0], "password_hash": user[1], "is_active": user[2]}
-        elif not isinstance(user, dict):
-            user = dict(user)
+        user_id, password_hash, is_active = user
 
-        if not user["is_active"]:
+        if not is_active:
             return False, "Account is not active"
 
-        if not UserManager.verify_password(current_password, user["password_hash"]):
+        if not UserManager.verify_password(current_password, password_hash):
             return False, "Current password is incorrect"
 
         new_hash = UserManager.hash_password(new_password)
@@ -392,7 +474,7 @@ class UserManager:
                 updated_date = CURRENT_TIMESTAMP
             WHERE id = ?
             """,
-            (new_hash, user["id"]),
+            (new_hash, user_id),
         )
         return True, "Password changed successfully"
 
@@ -147,6 +147,14 @@ class MROStockManager:
             WHERE status = 'Active'
         ''')
 
+        # Covering index for the CM parts consumption list: active parts
+        # already in part_number order, so no table access or sort step
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_mro_active_parts
+            ON mro_inventory(status, part_number, name, location, quantity_in_stock)
+            WHERE status = 'Active'
+        ''')
+
         print("CHECK: MRO inventory indexes created successfully!")
 
         # Stock transactions table for tracking stock movements
@@ -13,9 +13,10 @@ directly as a standalone script for fresh installs:
 
 import csv
 import sqlite3
-import hashlib
 import os
 
+from database_utils import UserManager
+
 _DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cmms_data.db")
 
 
@@ -114,6 +115,12 @@ def migrate_existing_db(conn):
         except Exception:
             pass
 
+    # ---- corrective_maintenance: version for optimistic locking -------------
+    try:
+        cur.execute("ALTER TABLE corrective_maintenance ADD COLUMN version INTEGER DEFAULT 1")
+    except Exception:
+        pass  # column already exists
+
     # ---- equipment_missing_parts: add missing columns ----------------------
     for col_def in [
         "ALTER TABLE equipment_missing_parts ADD COLUMN description              TEXT",
@@ -641,7 +648,7 @@ def create_indexes(conn):
 # ---------------------------------------------------------------------------
 
 def _hash(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
+    return UserManager.hash_password(password)
 
 
 def seed_default_users(conn):
@@ -0,0 +1,66 @@
+"""
+Tests for csv_sync's in-memory cache of the priority CSV files.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv_sync
+
+
+@pytest.fixture
+def csv_files(tmp_path, monkeypatch):
+    """Point csv_sync at empty priority files in a temp dir with a cold cache."""
+    files = {p: str(tmp_path / f"PM_LIST_A220_{p}.csv") for p in (1, 2, 3)}
+    monkeypatch.setattr(csv_sync, "CSV_FILES", files)
+    monkeypatch.setattr(csv_sync, "_cache", {})
+    monkeypatch.setattr(csv_sync, "_cache_stat", {})
+    monkeypatch.setattr(csv_sync, "_dirty", set())
+    yield files
+    csv_sync.flush_csvs()
+
+
+def _simulate_restart():
+    csv_sync._cache.clear()
+    csv_sync._cache_stat.clear()
+
+
+def test_resaving_unchanged_asset_after_reload_does_not_rewrite(csv_files):
+    asset = dict(
+        bfm_no=1234,
+        description="Hydraulic press",
+        location="Bay 2",
+        sap_no=987,
+        tool_id=None,
+        priority=1,
+        pm_qty=2,
+        reviewed="YES",
+    )
+    csv_sync.sync_asset_to_csv(**asset)
+    csv_sync.flush_csvs()
+    before = os.stat(csv_files[1]).st_mtime_ns
+
+    _simulate_restart()
+    csv_sync.sync_asset_to_csv(**asset)
+
+    assert not csv_sync._dirty
+    csv_sync.flush_csvs()
+    assert os.stat(csv_files[1]).st_mtime_ns == before
+    assert csv_sync.get_priority_from_csv(1234) == 1
+
+
+def test_changed_asset_after_reload_is_rewritten(csv_files):
+    csv_sync.sync_asset_to_csv(1234, description="Old", priority=1)
+    csv_sync.flush_csvs()
+
+    _simulate_restart()
+    csv_sync.sync_asset_to_csv(1234, description="New", priority=1)
+
+    assert csv_sync._dirty == {1}
+    csv_sync.flush_csvs()
+    with open(csv_files[1], encoding="utf-8-sig") as fh:
+        assert "New" in fh.read()